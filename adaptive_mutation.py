@@ -0,0 +1,121 @@
+import numpy as np
+
+# Self-adaptive mutation with the 1/5th success rule (Rechenberg).
+# A mutation counts as a success when the offspring is fitter than the better of its two parents.
+# After every generation the success ratio of the mutated offspring is compared to the target (1/5):
+#   - more successes: the mutations are too timid, the mutation strength is multiplied by `factor`;
+#   - fewer successes: they are too disruptive, it is divided by `factor`.
+# The strength is whatever the script mutates with: the step of a float mutation (genetic_sample's
+# coefficient scaling, the random_mutation_min_val/max_val range of pygad's "random" mutation), or the
+# rate of a bit-flip mutation (genetic_knapsack's mutate() is called with success_rule.value).
+#   - hand-rolled loops: record the fitness of the parents of every mutated child, then call update()
+#     with the children's fitness once they are evaluated (see genetic_sample.py)
+#   - pygad runs: pygad.GA(..., **success_rule.callbacks(apply=SuccessRule.apply_random_mutation_step))
+#     The strength is the step of the "random" mutation: values in [-step, step] are added to the mutated
+#     genes, starting at pygad's default [-1, 1] for SuccessRule(1.0, low, high).
+#     SuccessRule(1.0, 1.0, 1.0) keeps pygad's fixed mutation.
+# pygad's built-in crossovers pair parents k and k + 1 (modulo the number of parents) for offspring k,
+# which is how the callbacks find the parents of each offspring.
+
+
+class SuccessRule:
+    """
+    Mutation strength controlled by the 1/5th success rule.
+
+    Parameters:
+    value: initial mutation strength (step size or rate)
+    low, high: bounds of the mutation strength
+    target: success ratio the rule aims at
+    factor: multiplier applied to the strength after every generation (> 1)
+    """
+
+    def __init__(self, value, low, high, target=0.2, factor=1.2):
+        if factor <= 1:
+            raise ValueError(f"factor must be greater than 1, not {factor}")
+        self.value = value
+        self.low = low
+        self.high = high
+        self.target = target
+        self.factor = factor
+        self.successes = 0  # Successful mutations so far
+        self.trials = 0  # Mutated offspring evaluated so far
+        self.history = [value]  # Strength used in every generation
+
+    def update(self, parent_fitness, child_fitness):
+        """
+        Adapts the mutation strength to the outcome of one generation of mutations.
+
+        Parameters:
+        parent_fitness: fitness of the better parent of every mutated child
+        child_fitness: fitness of the mutated children, in the same order
+
+        Returns:
+        The new mutation strength.
+        """
+        trials = len(child_fitness)
+        if trials:
+            successes = int(np.sum(np.asarray(child_fitness, dtype=np.float64) >
+                                   np.asarray(parent_fitness, dtype=np.float64)))
+            self.successes += successes
+            self.trials += trials
+            if successes > self.target * trials:
+                self.value = min(self.high, self.value * self.factor)
+            elif successes < self.target * trials:
+                self.value = max(self.low, self.value / self.factor)
+        self.history.append(self.value)
+        return self.value
+
+    def report(self):
+        """Returns a one-line summary of the adaptation."""
+        ratio = self.successes / self.trials if self.trials else 0.0
+        return (f"Adaptive mutation: strength {self.history[0]:.3g} -> {self.value:.3g} "
+                f"(range {min(self.history):.3g} to {max(self.history):.3g}), "
+                f"{100 * ratio:.1f}% of {self.trials} mutations successful")
+
+    # ======================== PYGAD ========================
+    @staticmethod
+    def apply_random_mutation_step(ga_instance, value):
+        """Sets the range of pygad's "random" mutation (added to the gene) to [-value, value]."""
+        ga_instance.random_mutation_min_val = -value
+        ga_instance.random_mutation_max_val = value
+
+    def callbacks(self, apply=None, on_start=None, on_parents=None, on_generation=None):
+        """
+        Returns the pygad callbacks adapting the mutation strength, calling the given callbacks first.
+
+        Parameters:
+        apply: function(ga_instance, value) putting the new strength into the GA (e.g.
+               SuccessRule.apply_random_mutation_step), None when the mutation reads self.value itself
+        on_start, on_parents, on_generation: the script's own callbacks
+
+        Usage: pygad.GA(..., **success_rule.callbacks(apply=SuccessRule.apply_random_mutation_step))
+        """
+        best_parents = []  # Fitness of the better parent of each offspring of the current generation
+
+        def adaptive_on_start(ga_instance):
+            if on_start is not None:
+                on_start(ga_instance)
+            if apply is not None:
+                apply(ga_instance, self.value)
+
+        def adaptive_on_parents(ga_instance, parents):
+            if on_parents is not None:
+                on_parents(ga_instance, parents)
+            fitness = np.asarray(ga_instance.last_generation_fitness, dtype=np.float64)
+            parent_fitness = fitness[ga_instance.last_generation_parents_indices]
+            num_parents = len(parent_fitness)
+            best_parents[:] = [max(parent_fitness[k % num_parents], parent_fitness[(k + 1) % num_parents])
+                               for k in range(ga_instance.num_offspring)]
+
+        def adaptive_on_generation(ga_instance):
+            result = on_generation(ga_instance) if on_generation is not None else None
+            if best_parents:
+                # The offspring are the last rows of the new population (after the elite or kept parents)
+                offspring_fitness = ga_instance.last_generation_fitness[-len(best_parents):]
+                value = self.update(best_parents, offspring_fitness)
+                if apply is not None:
+                    apply(ga_instance, value)
+            return result
+
+        return {"on_start": adaptive_on_start, "on_parents": adaptive_on_parents,
+                "on_generation": adaptive_on_generation}
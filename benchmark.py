@@ -0,0 +1,373 @@
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Benchmark suite of every problem in the repository.
+# Each case imports the fitness function and the operators of one script (the scripts only run
+# their GA when executed directly) and measures, for several population and problem sizes:
+#   - evaluations per second: random solutions evaluated by the script's fitness function;
+#   - seconds per generation: a few generations of the script's own GA loop (pygad with the script's
+#     settings, or the hand-rolled loop), best of up to 3 runs;
+#   - peak memory: peak of the Python allocations (tracemalloc, NumPy arrays included) during one
+#     generation. Memory allocated by pymunk's C library is not seen by tracemalloc.
+# The physics cases evaluate serially in this process (no worker pool), so the numbers do not
+# depend on the number of cores.
+# Results are written as JSON. Comparing them with a stored baseline (of the same machine) reports
+# every measurement worse than the baseline by more than the tolerance, and exits with status 1.
+#
+# Usage:
+#   python benchmark.py                          run every case, write benchmark/results.json
+#   python benchmark.py --quick knapsack points  smallest sizes only, selected cases
+#   python benchmark.py --save-baseline          run and store the results as benchmark/baseline.json
+#   python benchmark.py --compare                run and compare with benchmark/baseline.json
+
+output_dir = "benchmark"
+results_path = os.path.join(output_dir, "results.json")
+baseline_path = os.path.join(output_dir, "baseline.json")
+default_tolerance = 0.25  # Relative slowdown (or memory growth) reported as a regression
+min_seconds = 0.5  # Evaluations are repeated for at least this long
+repeats = 3  # The generation time is the best of this many runs (fewer when the runs take over 5 s in total)
+num_generations = 3  # Generations timed per run
+
+
+def random_genes(rng, gene_space, num_solutions):
+    """Draws solutions uniformly within a pygad gene_space of {"low": ..., "high": ...} ranges."""
+    low = np.array([gene["low"] for gene in gene_space], dtype=np.float64)
+    high = np.array([gene["high"] for gene in gene_space], dtype=np.float64)
+    return rng.uniform(low, high, size=(num_solutions, len(gene_space)))
+
+
+def run_pygad(fitness_func, population_size, generations, batch=False, **settings):
+    """Runs pygad for a few generations (fitness_batch_size=population_size if batch)."""
+    import pygad
+    ga_instance = pygad.GA(num_generations=generations, fitness_func=fitness_func, sol_per_pop=population_size,
+                           fitness_batch_size=population_size if batch else None, random_seed=0,
+                           suppress_warnings=True, **settings)
+    ga_instance.run()
+
+
+# ======================== CASES ========================
+# Every case function receives a problem size and returns (evaluate, random_solutions, run_ga):
+#   evaluate(solutions): fitness values of the solutions
+#   random_solutions(rng, population_size): a population of random solutions
+#   run_ga(population_size, generations): runs the script's GA loop
+
+
+def polynomial_case(size):
+    """Hand-rolled GA approximating sin(x) (genetic_sample.py). No problem size."""
+    script = importlib.import_module("genetic_sample")
+    evaluate = lambda solutions: [script.fitness_function(*solution, math.sin) for solution in solutions]
+    random_solutions = lambda rng, n: [script.generate_individual() for _ in range(n)]
+    run_ga = lambda population_size, generations: script.generate_evolution(population_size, generations, math.sin)
+    return evaluate, random_solutions, run_ga
+
+
+def polynomial_pygad_case(size):
+    """pygad polynomial approximating sin(x) (pygad_sample.py). No problem size."""
+    script = importlib.import_module("pygad_sample")
+    evaluate = lambda solutions: [script.fitness_func(None, solution, idx) for idx, solution in enumerate(solutions)]
+    random_solutions = lambda rng, n: rng.uniform(script.init_range_low, script.init_range_high, size=(n, script.num_genes))
+    run_ga = lambda population_size, generations: run_pygad(
+        script.fitness_func, population_size, generations, num_parents_mating=script.num_parents_mating,
+        num_genes=script.num_genes, init_range_low=script.init_range_low, init_range_high=script.init_range_high,
+        parent_selection_type=script.parent_selection_type, keep_parents=script.keep_parents,
+        crossover_type=script.crossover_type, mutation_type=script.mutation_type,
+        mutation_percent_genes=script.mutation_percent_genes)
+    return evaluate, random_solutions, run_ga
+
+
+def knapsack_items(num_items):
+    """Random (value, weight) items like the knapsack scripts, and a capacity of 3 per item (300 for 100)."""
+    item_rng = random.Random(0)
+    return [(item_rng.randint(1, 10), item_rng.randint(1, 10)) for _ in range(num_items)], 3 * num_items
+
+
+def knapsack_case(size):
+    """Hand-rolled knapsack GA (genetic_knapsack.py). Problem size: number of items."""
+    script = importlib.import_module("genetic_knapsack")
+    script.items, script.W = knapsack_items(size)
+    script.N = size
+
+    def run_ga(population_size, generations):
+        script.POP_SIZE, script.GENERATIONS = population_size, generations
+        script.genetic_algorithm()
+
+    evaluate = lambda solutions: [script.fitness(solution) for solution in solutions]
+    random_solutions = lambda rng, n: [script.random_solution() for _ in range(n)]
+    return evaluate, random_solutions, run_ga
+
+
+def knapsack_pygad_case(size):
+    """pygad knapsack (pygad_knapsack.py). Problem size: number of items."""
+    script = importlib.import_module("pygad_knapsack")
+    script.items, script.W = knapsack_items(size)
+    script.N = size
+    evaluate = lambda solutions: [script.fitness_func(None, solution, idx) for idx, solution in enumerate(solutions)]
+    random_solutions = lambda rng, n: rng.integers(0, 2, size=(n, size))
+    run_ga = lambda population_size, generations: run_pygad(
+        script.fitness_func, population_size, generations, num_parents_mating=script.num_parents_mating,
+        num_genes=size, parent_selection_type="sss", keep_parents=2, crossover_type="single_point",
+        mutation_type=script.binary_mutation,
+        initial_population=np.random.default_rng(0).integers(0, 2, size=(population_size, size)))
+    return evaluate, random_solutions, run_ga
+
+
+def cubic_points(num_points):
+    """Noisy samples of a cubic, as the (n, 2) point array of the points approximation scripts."""
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-10, 10, num_points)
+    y = 0.01 * x ** 3 - 0.2 * x ** 2 + x + 2 + rng.normal(0, 1, num_points)
+    return np.column_stack([x, y])
+
+
+def points_case(size, module="pygad_points_approximation"):
+    """pygad polynomial through points (pygad_points_approximation.py). Problem size: number of points."""
+    script = importlib.import_module(module)
+    script.point_array = cubic_points(size)
+    callbacks = {}
+    if hasattr(script, "repair_smoothness"):
+        script.x_min, script.x_max = script.x_range(script.point_array, script.chunk_size)
+        callbacks = {"on_start": script.on_start, "on_mutation": script.on_mutation}
+    evaluate = lambda solutions: script.fitness_func(None, solutions, range(len(solutions)))
+    random_solutions = lambda rng, n: rng.uniform(script.init_range_low, script.init_range_high, size=(n, script.num_genes))
+    run_ga = lambda population_size, generations: run_pygad(
+        script.fitness_func, population_size, generations, batch=True, num_parents_mating=script.num_parents_mating,
+        num_genes=script.num_genes, init_range_low=script.init_range_low, init_range_high=script.init_range_high,
+        parent_selection_type=script.parent_selection_type, keep_parents=script.keep_parents,
+        crossover_type=script.crossover_type, mutation_type=script.mutation_type,
+        mutation_percent_genes=script.mutation_percent_genes, **callbacks)
+    return evaluate, random_solutions, run_ga
+
+
+def points_smooth_case(size):
+    """Smoothness-constrained version (pygad_points_approximation_force_smooth.py). Problem size: number of points."""
+    return points_case(size, module="pygad_points_approximation_force_smooth")
+
+
+def plant_sim_case(size):
+    """pygad plant schedule (pygad_plant_sim.py, first phase). Problem size: number of days."""
+    script = importlib.import_module("pygad_plant_sim")
+    price_rng = random.Random(69)
+    script.prices = [100 + price_rng.uniform(30, 50) * math.sin((i / 80) * price_rng.uniform(0.6, 1.2))
+                     + price_rng.randint(-5, 5) for i in range(size)]
+    script.N = size
+    evaluate = lambda solutions: [script.fitness_func(None, solution, idx) for idx, solution in enumerate(solutions)]
+    random_solutions = lambda rng, n: rng.integers(0, 2, size=(n, size))
+    run_ga = lambda population_size, generations: run_pygad(
+        script.fitness_func, population_size, generations, num_parents_mating=script.num_parents_mating,
+        num_genes=size, parent_selection_type="random", keep_parents=4, crossover_type="single_point",
+        mutation_type=script.binary_mutation, initial_population=np.ones((population_size, size)))
+    return evaluate, random_solutions, run_ga
+
+
+def box_case(size):
+    """Box of falling balls (pymunk_sample.py). Problem size: "serial" (one space per box) or "batched"."""
+    script = importlib.import_module("pymunk_sample")
+    if size == "batched":
+        fitness_func = script.simulate_falling_balls_batch
+    else:
+        from parallel_eval import PoolEvaluator
+        fitness_func = PoolEvaluator(script.simulate_falling_balls, 1, kwargs={
+            "termination": script.termination if script.use_termination else None})
+    evaluate = lambda solutions: fitness_func(None, solutions, range(len(solutions)))
+    random_solutions = lambda rng, n: rng.uniform(script.init_range_low, script.init_range_high, size=(n, script.num_genes))
+    run_ga = lambda population_size, generations: run_pygad(
+        fitness_func, population_size, generations, batch=True, num_parents_mating=script.num_parents_mating,
+        num_genes=script.num_genes, init_range_low=script.init_range_low, init_range_high=script.init_range_high,
+        parent_selection_type=script.parent_selection_type, keep_parents=script.keep_parents,
+        crossover_type=script.crossover_type, mutation_type=script.mutation_type,
+        mutation_percent_genes=script.mutation_percent_genes)
+    return evaluate, random_solutions, run_ga
+
+
+def throw_case(size):
+    """Ball throw (pymunk_throw.py). Problem size: fitness engine, "pool" (serial here), "batched" or "numpy"."""
+    script = importlib.import_module("pymunk_throw")
+    if size == "batched":
+        fitness_func = script.throw_ball_batch_simulation
+    elif size == "numpy":
+        fitness_func = script.throw_ball_numpy_simulation
+    else:
+        from parallel_eval import PoolEvaluator
+        fitness_func = PoolEvaluator(script.throw_ball_simulation, 1, kwargs={
+            "termination": script.termination, "prescreen": script.prescreen, "timing": script.default_timing})
+    evaluate = lambda solutions: fitness_func(None, solutions, range(len(solutions)))
+    random_solutions = lambda rng, n: random_genes(rng, script.gene_space, n)
+    run_ga = lambda population_size, generations: run_pygad(
+        fitness_func, population_size, generations, batch=True, num_parents_mating=script.num_parents_mating,
+        num_genes=script.num_genes, gene_space=script.gene_space, parent_selection_type=script.parent_selection_type,
+        keep_parents=script.keep_parents, crossover_type=script.crossover_type, mutation_type=script.mutation_type,
+        mutation_percent_genes=script.mutation_percent_genes)
+    return evaluate, random_solutions, run_ga
+
+
+def collector_case(size):
+    """Ball collector (pymunk_ball_collector.py). Problem size: number of balls (12: the original scene)."""
+    script = importlib.import_module("pymunk_ball_collector")
+    from parallel_eval import PoolEvaluator
+    load = None if size == 12 else (size, 6, 12)  # Generated balls of radius 6, spatial hash of 12 px cells
+    fitness_func = PoolEvaluator(script.simulate_balls, 1, kwargs={
+        "termination": script.termination if script.use_termination else None, "timing": script.default_timing,
+        "load": load})
+    evaluate = lambda solutions: fitness_func(None, solutions, range(len(solutions)))
+    random_solutions = lambda rng, n: random_genes(rng, script.gene_space, n)
+    run_ga = lambda population_size, generations: run_pygad(
+        fitness_func, population_size, generations, batch=True, num_parents_mating=script.num_parents_mating,
+        num_genes=script.num_genes, gene_space=script.gene_space, parent_selection_type=script.parent_selection_type,
+        keep_parents=script.keep_parents, crossover_type=script.crossover_type, mutation_type=script.mutation_type,
+        mutation_percent_genes=script.mutation_percent_genes)
+    return evaluate, random_solutions, run_ga
+
+
+# Case name: (case function, problem sizes, population sizes). --quick only runs the first of each.
+cases = {
+    "polynomial": (polynomial_case, [None], [50, 200]),
+    "polynomial_pygad": (polynomial_pygad_case, [None], [20, 200]),
+    "knapsack": (knapsack_case, [100, 1000], [100, 400]),
+    "knapsack_pygad": (knapsack_pygad_case, [100, 1000], [100, 400]),
+    "points": (points_case, [4, 100000, 1000000], [20, 200]),
+    "points_smooth": (points_smooth_case, [4, 100000, 1000000], [20, 200]),
+    "plant_sim": (plant_sim_case, [2000, 10000], [50, 200]),
+    "box": (box_case, ["batched", "serial"], [20, 64]),
+    "throw": (throw_case, ["batched", "pool", "numpy"], [20, 200]),
+    "collector": (collector_case, [12, 100], [10, 20]),
+}
+
+
+# ======================== MEASUREMENTS ========================
+def measure(case_func, size, population_size):
+    """
+    Measures one case at one problem size and population size.
+
+    Returns:
+    A dict with the evaluations per second, the seconds per generation and the peak memory in MB.
+    """
+    evaluate, random_solutions, run_ga = case_func(size)
+    random.seed(0)
+    np.random.seed(0)
+    solutions = random_solutions(np.random.default_rng(0), population_size)
+
+    # Evaluations per second, over at least min_seconds
+    evaluate(solutions)  # Warm-up (scene creation, caches, first-call imports)
+    evaluations = 0
+    start = time.perf_counter()
+    while evaluations == 0 or time.perf_counter() - start < min_seconds:
+        evaluate(solutions)
+        evaluations += population_size
+    evaluations_per_second = evaluations / (time.perf_counter() - start)
+
+    # Seconds per generation, best of up to `repeats` runs of the GA loop
+    generation_times = []
+    while len(generation_times) < repeats and sum(generation_times) * num_generations < 5:
+        random.seed(0)
+        np.random.seed(0)
+        start = time.perf_counter()
+        run_ga(population_size, num_generations)
+        generation_times.append((time.perf_counter() - start) / num_generations)
+
+    # Peak of the Python allocations during one generation
+    tracemalloc.start()
+    run_ga(population_size, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"evaluations_per_second": evaluations_per_second, "seconds_per_generation": min(generation_times),
+            "peak_memory_mb": peak / 2 ** 20}
+
+
+def machine():
+    """Describes the machine, to spot comparisons with a baseline recorded elsewhere."""
+    return {"platform": platform.platform(), "processor": platform.processor(), "cpu_count": os.cpu_count(),
+            "python": platform.python_version(), "numpy": np.__version__}
+
+
+def run(names, quick=False):
+    """Runs the selected cases and returns the results (list of dicts), printing them as they come."""
+    results = []
+    print(f"{'case':<18}{'size':>10}{'pop':>6}{'evals/s':>12}{'s/gen':>11}{'peak MB':>10}")
+    for name in names:
+        case_func, sizes, population_sizes = cases[name]
+        for size in sizes[:1] if quick else sizes:
+            for population_size in population_sizes[:1] if quick else population_sizes:
+                result = {"case": name, "size": size, "population": population_size,
+                          **measure(case_func, size, population_size)}
+                results.append(result)
+                print(f"{name:<18}{str(size):>10}{population_size:>6}{result['evaluations_per_second']:>12.1f}"
+                      f"{result['seconds_per_generation']:>11.4f}{result['peak_memory_mb']:>10.2f}")
+    return results
+
+
+def compare(report, baseline, tolerance=default_tolerance):
+    """
+    Compares results with a baseline.
+
+    Parameters:
+    report: benchmark report (dict with "machine" and "results")
+    baseline: baseline report, in the same format
+    tolerance: relative degradation allowed before a measurement counts as a regression
+
+    Returns:
+    The list of regressions, as printable strings.
+    """
+    if report["machine"] != baseline["machine"]:
+        print("Warning: the baseline was recorded on another machine or environment:", baseline["machine"])
+    reference = {(r["case"], r["size"], r["population"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        key = (result["case"], result["size"], result["population"])
+        if key not in reference:
+            continue
+        old = reference[key]
+        # (metric, ratio > 1 when worse)
+        ratios = [("evaluations_per_second", old["evaluations_per_second"] / result["evaluations_per_second"]),
+                  ("seconds_per_generation", result["seconds_per_generation"] / old["seconds_per_generation"]),
+                  # Memory: ignore changes below 1 MB, small allocations vary between runs
+                  ("peak_memory_mb", (result["peak_memory_mb"] + 1) / (old["peak_memory_mb"] + 1))]
+        for metric, ratio in ratios:
+            if ratio > 1 + tolerance:
+                regressions.append(f"{key[0]} size={key[1]} pop={key[2]}: {metric} {old[metric]:.4g} -> "
+                                   f"{result[metric]:.4g} ({100 * (ratio - 1):.0f}% worse)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fitness functions and GA loops of the repository.")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {', '.join(cases)})")
+    parser.add_argument("--quick", action="store_true", help="only the first problem and population size of each case")
+    parser.add_argument("--output", default=results_path, help="JSON file the results are written to")
+    parser.add_argument("--save-baseline", action="store_true", help="also store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare the results with the baseline")
+    parser.add_argument("--baseline", default=baseline_path, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance, help="relative degradation allowed")
+    options = parser.parse_args()
+
+    unknown = [name for name in options.cases if name not in cases]
+    if unknown:
+        parser.error(f"unknown cases {unknown}, choose from {list(cases)}")
+
+    report = {"machine": machine(), "quick": options.quick, "results": run(options.cases or list(cases), options.quick)}
+    os.makedirs(os.path.dirname(options.output) or ".", exist_ok=True)
+    with open(options.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {options.output}")
+    if options.save_baseline:
+        os.makedirs(os.path.dirname(options.baseline) or ".", exist_ok=True)
+        with open(options.baseline, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Baseline written to {options.baseline}")
+    elif options.compare:
+        with open(options.baseline) as f:
+            regressions = compare(report, json.load(f), options.tolerance)
+        for line in regressions:
+            print("Regression:", line)
+        print(f"{len(regressions)} regressions beyond {100 * options.tolerance:.0f}% against {options.baseline}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,172 @@
+import os
+import random
+
+import numpy as np
+
+# Checkpoints of long GA runs.
+# Every few generations the population, its fitness values, the generation counter and the states
+# of the random generators (the GA's own numpy and Python generators, and the global numpy.random and
+# random modules used by custom operators) are written to a compressed .npz file. The file is
+# written next to the checkpoint and renamed over it, so a crash while saving keeps the previous one.
+# A new run of the script resumes from it: resume() puts the saved population, counter and generator
+# states into a freshly built pygad.GA, and the fitness function wrapped by fitness() returns the saved
+# fitness values for the saved population instead of evaluating it again. With the same settings,
+# the resumed run then continues exactly like the interrupted one.
+# Not saved: the state of the fitness wrappers (the surrogate archive, the screening statistics) and
+# pygad's history of best solutions, which only covers the generations run since the resume.
+#
+# Usage in a script:
+#   checkpoint = Checkpoint(path, every=10)
+#   ga_instance = pygad.GA(..., fitness_func=checkpoint.fitness(fitness_func), **checkpoint.callbacks())
+#   checkpoint.resume(ga_instance)  # Runs only the remaining generations, if a checkpoint exists
+#   ga_instance.run()
+#   checkpoint.remove()  # Once the results are safe, so that the next run starts from scratch
+
+
+def _python_state(state):
+    """Converts a random.getstate() tuple to (version, internal state words, gauss_next)."""
+    version, internal, gauss_next = state
+    return version, np.array(internal, dtype=np.int64), np.nan if gauss_next is None else gauss_next
+
+
+def _python_setstate(generator, version, internal, gauss_next):
+    gauss_next = None if np.isnan(gauss_next) else float(gauss_next)
+    generator.setstate((int(version), tuple(int(word) for word in internal), gauss_next))
+
+
+class Checkpoint:
+    """
+    Periodic checkpoint of a GA run in a compressed .npz file.
+
+    Parameters:
+    path: checkpoint file (replaced at every save)
+    every: number of generations between two checkpoints (the last generation is always saved)
+    """
+
+    def __init__(self, path, every=10):
+        self.path = path
+        self.every = every
+        self.resumed_generation = None  # Generation of the checkpoint resumed from, if any
+        self._saved_fitness = {}  # Saved fitness of the resumed population, by genes
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def save(self, generation, population, fitness, ga_instance=None):
+        """
+        Writes a checkpoint.
+
+        Parameters:
+        generation: number of generations completed
+        population: array of solutions (one per row)
+        fitness: fitness values of the population
+        ga_instance: optional pygad.GA whose own random generators are saved as well
+        """
+        arrays = {"generation": generation, "population": np.asarray(population), "fitness": np.asarray(fitness)}
+        generators = {"numpy": np.random, "python": random}
+        if ga_instance is not None:
+            generators.update(ga_numpy=ga_instance.numpy_random_generator, ga_python=ga_instance.python_random_generator)
+        for name, generator in generators.items():
+            if name.endswith("numpy"):
+                kind, keys, position, has_gauss, cached_gaussian = generator.get_state()
+                arrays[f"{name}_state"] = keys
+                arrays[f"{name}_extra"] = np.array([position, has_gauss, cached_gaussian], dtype=np.float64)
+            else:
+                version, internal, gauss_next = _python_state(generator.getstate())
+                arrays[f"{name}_state"] = internal
+                arrays[f"{name}_extra"] = np.array([version, gauss_next], dtype=np.float64)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temporary_path, self.path)  # Atomic: the previous checkpoint stays valid until this point
+
+    def load(self):
+        """Returns the checkpoint as a dict of arrays, or None if there is none."""
+        if not self.exists():
+            return None
+        with np.load(self.path) as data:
+            return {name: data[name] for name in data.files}
+
+    def restore_random_state(self, checkpoint, ga_instance=None):
+        """Restores the global (and, if given, the GA's) random generators saved in a checkpoint."""
+        generators = {"numpy": np.random, "python": random}
+        if ga_instance is not None and "ga_numpy_state" in checkpoint:
+            generators.update(ga_numpy=ga_instance.numpy_random_generator, ga_python=ga_instance.python_random_generator)
+        for name, generator in generators.items():
+            state, extra = checkpoint[f"{name}_state"], checkpoint[f"{name}_extra"]
+            if name.endswith("numpy"):
+                generator.set_state(("MT19937", state.astype(np.uint32), int(extra[0]), int(extra[1]), float(extra[2])))
+            else:
+                _python_setstate(generator, extra[0], state, extra[1])
+
+    def resume(self, ga_instance):
+        """
+        Loads the checkpoint, if any, into a pygad.GA built with the same settings as the saved run.
+        pygad.GA.run() then only runs the generations left (of the num_generations the GA was built with).
+
+        Returns:
+        The number of generations completed in the checkpoint (0 without a checkpoint).
+        """
+        checkpoint = self.load()
+        if checkpoint is None:
+            return 0
+        population = checkpoint["population"]
+        if population.shape != ga_instance.population.shape:
+            raise ValueError(f"Checkpoint {self.path} holds a population of shape {population.shape}, "
+                             f"the GA has {ga_instance.population.shape}: delete it to start from scratch")
+        generation = int(checkpoint["generation"])
+        ga_instance.population = population.astype(ga_instance.population.dtype)
+        ga_instance.last_generation_fitness = checkpoint["fitness"]
+        ga_instance.generations_completed = generation
+        ga_instance.num_generations = max(0, ga_instance.num_generations - generation)
+        self.restore_random_state(checkpoint, ga_instance)
+        # The first fitness evaluation of the resumed run (the saved population) uses the saved values
+        self.resumed_generation = generation
+        self._saved_fitness = {solution.tobytes(): fitness
+                               for solution, fitness in zip(ga_instance.population, checkpoint["fitness"])}
+        return generation
+
+    def fitness(self, fitness_func):
+        """Wraps a pygad fitness function (single or batch) to reuse the saved fitness after a resume."""
+
+        def resumed_fitness(ga_instance, solutions, solution_indices):
+            if not self._saved_fitness or ga_instance.generations_completed != self.resumed_generation:
+                self._saved_fitness = {}  # Past the resumed population
+                return fitness_func(ga_instance, solutions, solution_indices)
+            batch = np.ndim(solution_indices) > 0
+            rows = np.asarray(solutions if batch else [solutions], dtype=ga_instance.population.dtype)
+            saved = [self._saved_fitness.get(row.tobytes()) for row in rows]
+            missing = [i for i, fitness in enumerate(saved) if fitness is None]
+            if missing:
+                indices = np.atleast_1d(solution_indices)
+                values = fitness_func(ga_instance, rows[missing], [indices[i] for i in missing]) if batch else \
+                    [fitness_func(ga_instance, solutions, solution_indices)]
+                for i, value in zip(missing, values):
+                    saved[i] = value
+            return saved if batch else saved[0]
+
+        return resumed_fitness
+
+    def callbacks(self, on_generation=None):
+        """
+        Returns the pygad callback saving the checkpoints, calling the given on_generation callback first.
+
+        Usage: pygad.GA(..., **checkpoint.callbacks(on_generation=on_generation))
+        """
+
+        def checkpoint_on_generation(ga_instance):
+            result = on_generation(ga_instance) if on_generation is not None else None
+            generation = ga_instance.generations_completed
+            last = generation == (self.resumed_generation or 0) + ga_instance.num_generations
+            if generation % self.every == 0 or last or result == "stop":
+                self.save(generation, ga_instance.population, ga_instance.last_generation_fitness, ga_instance)
+            return result
+
+        return {"on_generation": checkpoint_on_generation}
+
+    def remove(self):
+        """Deletes the checkpoint (after a completed run, so that the next run starts from scratch)."""
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,146 @@
+import numpy as np
+
+# Cheap geometric checks of ball collector designs (pymunk_ball_collector.py), before simulating them.
+# A design is a rotating arm (length and speed genes) and a collector polyline (11 points, 22 genes).
+# Three kinds of designs fail without needing a simulation:
+#   - the polyline crosses itself (two non-consecutive segments intersect), which makes no container;
+#   - a collector segment enters the circle swept by the arm, so the arm hits the static collector
+#     and cannot turn to throw the balls;
+#   - the box is sealed: the balls are thrown in through the gap between the lip on the left of the box
+#     (points 1 to 5) and the end of its lid (points 9 to 11), a gap narrower than a ball lets none in.
+# GeometryPrecheck runs the tests for a whole batch with NumPy array operations, gives the failing
+# designs a penalty fitness below any simulated design, and simulates only the others.
+
+lip_segments = slice(0, 4)  # Segments of the lip: points 1 to 5
+lid_segments = slice(8, 10)  # Segments of the lid: points 9 to 11
+
+
+def polyline_segments(points):
+    """
+    Returns the (P, S, 2, 2) segments (start, end) of the polylines given as (P, 2 * (S + 1)) flat coordinates.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(len(points), -1, 2)
+    return np.stack([points[:, :-1], points[:, 1:]], axis=2)
+
+
+def total_distance(points):
+    """Returns the length of each polyline (the material cost of simulate_balls), as a (P,) array."""
+    segments = polyline_segments(points)
+    return np.hypot(*(segments[:, :, 1] - segments[:, :, 0]).transpose(2, 0, 1)).sum(axis=1)
+
+
+def _cross(o, a, b):
+    """z component of (a - o) x (b - o), broadcast over the leading axes."""
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+
+def self_intersections(points):
+    """
+    Returns the number of pairs of non-consecutive segments that cross each other in each polyline, as a (P,) array.
+    Two segments cross when the ends of each one lie strictly on both sides of the other.
+    """
+    segments = polyline_segments(points)
+    num_segments = segments.shape[1]
+    i, j = np.triu_indices(num_segments, k=2)  # Consecutive segments share a point and never count
+    a1, a2 = segments[:, i, 0], segments[:, i, 1]
+    b1, b2 = segments[:, j, 0], segments[:, j, 1]
+    crossing = ((_cross(a1, a2, b1) * _cross(a1, a2, b2) < 0)
+                & (_cross(b1, b2, a1) * _cross(b1, b2, a2) < 0))
+    return crossing.sum(axis=1)
+
+
+def _point_segment_distance(point, start, end):
+    """Distance between points and segments, broadcast over the leading axes of (..., 2) arrays."""
+    direction = end - start
+    t = np.clip(((point - start) * direction).sum(axis=-1) / np.maximum((direction * direction).sum(axis=-1), 1e-12), 0, 1)
+    closest = start + t[..., None] * direction
+    return np.hypot(closest[..., 0] - point[..., 0], closest[..., 1] - point[..., 1])
+
+
+def arm_clearance(points, arm_length, pivot, arm_radius=5, segment_radius=5):
+    """
+    Returns, for each design, the distance between the collector and the circle swept by the arm (P,) array,
+    negative when the arm hits the collector.
+
+    Parameters:
+    points: (P, 22) collector coordinates
+    arm_length: (P,) arm lengths, the arm turns around its center
+    pivot: (x, y) center of rotation of the arm
+    """
+    segments = polyline_segments(points)
+    distance = _point_segment_distance(np.asarray(pivot, dtype=np.float64), segments[:, :, 0], segments[:, :, 1]).min(axis=1)
+    return distance - (np.asarray(arm_length) / 2 + arm_radius + segment_radius)
+
+
+def box_opening(points):
+    """
+    Returns the width of the opening of each box (P,) array: the shortest distance between the lip and
+    the lid of the collector, 0 when they touch or cross.
+
+    Parameters:
+    points: (P, 22) collector coordinates
+    """
+    segments = polyline_segments(points)
+    lip = segments[:, lip_segments][:, :, None]  # (P, 4, 1, 2, 2): every lip segment against every lid segment
+    lid = segments[:, lid_segments][:, None, :]  # (P, 1, 2, 2, 2)
+    a1, a2, b1, b2 = lip[..., 0, :], lip[..., 1, :], lid[..., 0, :], lid[..., 1, :]
+    # Two segments that do not cross are closest at an end of one of them
+    distance = np.minimum.reduce([_point_segment_distance(a1, b1, b2), _point_segment_distance(a2, b1, b2),
+                                  _point_segment_distance(b1, a1, a2), _point_segment_distance(b2, a1, a2)])
+    crossing = (_cross(a1, a2, b1) * _cross(a1, a2, b2) <= 0) & (_cross(b1, b2, a1) * _cross(b1, b2, a2) <= 0)
+    return np.where(crossing, 0.0, distance).reshape(len(segments), -1).min(axis=1)
+
+
+class GeometryPrecheck:
+    """
+    Batch fitness function scoring invalid collector designs without simulating them.
+
+    Parameters:
+    fitness_func: batch fitness function fitness_func(ga_instance, solutions, solution_indices) running the simulations
+    pivot: (x, y) center of rotation of the arm
+    min_opening: narrowest gap between the lip and the lid of the box that lets a ball in (its diameter,
+                 plus the 5 px radius of the collector segments on each side)
+    penalty: fitness removed from an invalid design, on top of its material and motor costs
+             (1000, one ball, puts it below any simulated design)
+    k_distance, k_w: material and motor costs per pixel of collector and per unit of speed, as in simulate_balls
+    """
+
+    def __init__(self, fitness_func, pivot, min_opening=60, penalty=1000, k_distance=0.1, k_w=0.1):
+        self.fitness_func = fitness_func
+        self.pivot = pivot
+        self.min_opening = min_opening
+        self.penalty = penalty
+        self.k_distance = k_distance
+        self.k_w = k_w
+        self.checked = 0
+        self.crossing = 0  # Designs skipped because the collector crosses itself
+        self.blocked = 0  # Designs skipped because the arm hits the collector
+        self.sealed = 0  # Designs skipped because no ball fits through the opening of the box
+
+    def __call__(self, ga_instance, solutions, solution_indices):
+        """Returns the fitness of every solution, simulating only the geometrically valid ones."""
+        solutions = np.asarray(solutions, dtype=np.float64)
+        arm_length, w, points = solutions[:, 0], solutions[:, 1], solutions[:, 2:]
+        crossing = self_intersections(points) > 0
+        blocked = arm_clearance(points, arm_length, self.pivot) < 0
+        sealed = box_opening(points) < self.min_opening
+        invalid = crossing | blocked | sealed
+
+        # The penalty keeps the costs, so the GA still prefers cheaper designs among invalid ones
+        fitness = -self.k_distance * total_distance(points) - self.k_w * w - self.penalty
+        valid = np.flatnonzero(~invalid)
+        if len(valid):
+            fitness[valid] = self.fitness_func(ga_instance, solutions[valid], [solution_indices[i] for i in valid])
+
+        self.checked += len(solutions)
+        self.crossing += int(crossing.sum())
+        self.blocked += int((blocked & ~crossing).sum())
+        self.sealed += int((sealed & ~crossing & ~blocked).sum())
+        return fitness.tolist()
+
+    def report(self):
+        """Returns a one-line summary of the simulations skipped so far."""
+        skipped = self.crossing + self.blocked + self.sealed
+        percent = 100 * skipped / self.checked if self.checked else 0
+        return (f"Geometry pre-check: {skipped}/{self.checked} simulations skipped ({percent:.1f}%): "
+                f"{self.crossing} self-intersecting collectors, {self.blocked} blocked arms, {self.sealed} sealed boxes")
@@ -0,0 +1,201 @@
+import numpy as np
+
+# Stall detection for the GA runs.
+# The scripts run a fixed number of generations, long after the best fitness has stopped improving.
+# A ConvergenceMonitor follows, every generation, the best fitness and the diversity of the population
+# (mean standard deviation of the genes, relative to the largest standard deviation seen for each gene:
+# 1 for a population as spread as it ever was, 0 when every individual is identical).
+# The run has stalled when the best fitness has not improved (by more than min_improvement, relative)
+# for `window` generations, or when the diversity falls below min_diversity (if set). Then it either:
+#   - "stop": ends the run;
+#   - "restart": re-initializes the worst restart_fraction of the population with random solutions
+#     (the best ones are kept) and goes on, and stops at the first stall after max_restarts restarts.
+# report() tells how many generations, and about how many evaluations, were saved compared to the
+# planned number of generations (saved evaluations are estimated at the mean evaluations per generation).
+#   - pygad runs: pygad.GA(..., **monitor.callbacks(on_generation=on_generation))
+#   - hand-rolled loops: call update() after evaluating each generation (see genetic_sample.py)
+
+
+class ConvergenceMonitor:
+    """
+    Stops or partially restarts a GA run once its progress stalls.
+
+    Parameters:
+    num_generations: planned number of generations (to report the savings)
+    window: number of generations without improvement of the best fitness that counts as a stall
+    min_improvement: smallest improvement counted as progress, relative to the best fitness (absolute below 1)
+    min_diversity: diversity (0 to 1) under which the population counts as stalled too, None to ignore it
+    action: "stop" or "restart"
+    restart_fraction: fraction of the population (the worst) re-initialized by a restart
+    max_restarts: number of restarts before the next stall stops the run
+    random_solutions: function(num_solutions) returning new random solutions (array, one per row), used
+                      by the restarts. For pygad runs it defaults to solutions drawn like pygad's initial
+                      population: from the GA's gene_space (value lists or {"low": ..., "high": ...} ranges)
+                      or init_range_low/init_range_high, with its gene_type. Scripts whose genes are only
+                      constrained by their operators (e.g. binary genes without a gene_space) pass their own.
+    verbose: print every stall
+    """
+
+    def __init__(self, num_generations, window=50, min_improvement=1e-6, min_diversity=None, action="stop",
+                 restart_fraction=0.5, max_restarts=3, random_solutions=None, verbose=True):
+        if action not in ("stop", "restart"):
+            raise ValueError(f"action must be 'stop' or 'restart', not {action!r}")
+        self.num_generations = num_generations
+        self.window = window
+        self.min_improvement = min_improvement
+        self.min_diversity = min_diversity
+        self.action = action
+        self.restart_fraction = restart_fraction
+        self.max_restarts = max_restarts
+        self.random_solutions = random_solutions
+        self.verbose = verbose
+
+        self.best = -np.inf  # Best fitness so far
+        self.last_improvement = 0  # Generation of the last improvement (or restart)
+        self.reference_spread = None  # Largest standard deviation seen, per gene
+        self.diversity = 1.0
+        self.generations = 0  # Generations run so far
+        self.evaluations = 0  # Evaluations so far (restarts included)
+        self.restarts = 0
+        self.stopped_at = None  # Generation the run was stopped at
+
+    def measure_diversity(self, population):
+        """Returns the diversity of a population (array with one solution per row), between 0 and 1."""
+        spread = np.std(np.asarray(population, dtype=np.float64), axis=0)
+        if self.reference_spread is None:
+            self.reference_spread = spread
+        else:
+            self.reference_spread = np.maximum(self.reference_spread, spread)
+        varying = self.reference_spread > 0
+        return float(np.mean(spread[varying] / self.reference_spread[varying])) if varying.any() else 0.0
+
+    def update(self, generation, population, fitness, evaluations=0):
+        """
+        Records a generation once its population has been evaluated.
+
+        Parameters:
+        generation: number of the generation
+        population: its solutions, one per row
+        fitness: their fitness values
+        evaluations: number of fitness evaluations done for this generation
+
+        Returns:
+        None to go on, "stop" to end the run, or "restart" to re-initialize the individuals
+        returned by restart_indices(fitness) (the caller evaluates them).
+        """
+        self.generations = generation + 1
+        self.evaluations += evaluations
+        best = float(np.max(fitness))
+        if self.best == -np.inf or best - self.best > self.min_improvement * max(1.0, abs(self.best)):
+            self.best = best
+            self.last_improvement = generation
+        self.diversity = self.measure_diversity(population)
+
+        stalled = generation - self.last_improvement >= self.window
+        collapsed = self.min_diversity is not None and self.diversity < self.min_diversity
+        if not (stalled or collapsed):
+            return None
+        reason = (f"no improvement for {generation - self.last_improvement} generations" if stalled
+                  else f"diversity {self.diversity:.3f} < {self.min_diversity}")
+        if self.action == "restart" and self.restarts < self.max_restarts:
+            self.restarts += 1
+            self.last_improvement = generation  # A restart gets a full window to improve
+            self.reference_spread = None  # The new individuals define the diversity of the restarted population
+            if self.verbose:
+                print(f"Generation {generation}: {reason}, diversity {self.diversity:.3f}, restart {self.restarts}")
+            return "restart"
+        self.stopped_at = generation
+        if self.verbose:
+            print(f"Generation {generation}: {reason}, diversity {self.diversity:.3f}, stopping")
+        return "stop"
+
+    def restart_indices(self, fitness):
+        """Returns the indices of the worst restart_fraction of a population, to re-initialize."""
+        count = max(1, int(round(self.restart_fraction * len(fitness))))
+        return np.argsort(np.asarray(fitness, dtype=np.float64), kind="stable")[:count]
+
+    def count_evaluations(self, evaluations):
+        """Adds evaluations done outside update() (e.g. of restarted individuals)."""
+        self.evaluations += evaluations
+
+    def report(self):
+        """Returns a one-line summary of the generations and evaluations saved."""
+        if self.stopped_at is None:
+            return (f"Convergence: ran {self.generations} of {self.num_generations} generations, "
+                    f"{self.restarts} restarts, diversity {self.diversity:.3f}")
+        saved = max(0, self.num_generations - self.generations)
+        per_generation = self.evaluations / self.generations if self.generations else 0
+        return (f"Convergence: stopped after {self.generations} of {self.num_generations} generations "
+                f"({self.restarts} restarts, diversity {self.diversity:.3f}): {saved} generations and "
+                f"about {saved * per_generation:.0f} evaluations saved")
+
+    # ======================== PYGAD ========================
+    @staticmethod
+    def _sample_gene(rng, space, low, high, num_solutions):
+        """Draws num_solutions values of one gene from its pygad gene space (None: uniform in [low, high])."""
+        if space is None:
+            return rng.uniform(low, high, num_solutions)
+        if isinstance(space, dict):
+            if space.get("step") is not None:
+                return rng.choice(np.arange(space["low"], space["high"], space["step"]), num_solutions)
+            return rng.uniform(space["low"], space["high"], num_solutions)
+        if np.ndim(space) == 0:  # A fixed value
+            return np.full(num_solutions, space, dtype=np.float64)
+        values = [value for value in space if value is not None]  # None picks from the init range in pygad
+        return rng.choice(values, num_solutions) if values else rng.uniform(low, high, num_solutions)
+
+    def _pygad_random_solutions(self, ga_instance, num_solutions):
+        """Random solutions drawn like the initial population of a pygad.GA (gene_space, gene_type)."""
+        if hasattr(ga_instance, "generate_initial_population"):  # pygad >= 3.8 samples them itself
+            return ga_instance.generate_initial_population(num_solutions)
+        rng = ga_instance.numpy_random_generator  # The GA's generator: checkpoints restore it
+        space = ga_instance.gene_space
+        # A single list of values or a single dict applies to every gene, otherwise there is one entry per gene
+        shared = space is None or isinstance(space, dict) or all(np.ndim(value) == 0 for value in space)
+        solutions = np.column_stack([self._sample_gene(rng, space if shared else space[gene],
+                                                       ga_instance.init_range_low, ga_instance.init_range_high,
+                                                       num_solutions)
+                                     for gene in range(ga_instance.num_genes)])
+        # Integer genes are rounded; assigning to the population converts to its dtype
+        gene_types = [ga_instance.gene_type] * ga_instance.num_genes if ga_instance.gene_type_single else ga_instance.gene_type
+        for gene, gene_type in enumerate(gene_types):
+            if np.issubdtype(np.dtype(gene_type[0]), np.integer):
+                solutions[:, gene] = np.round(solutions[:, gene])
+        return solutions
+
+    def _restart_pygad(self, ga_instance):
+        """Re-initializes and evaluates the worst individuals of a pygad population."""
+        indices = self.restart_indices(ga_instance.last_generation_fitness)
+        if self.random_solutions is not None:
+            solutions = np.asarray(self.random_solutions(len(indices)))
+        else:
+            solutions = self._pygad_random_solutions(ga_instance, len(indices))
+        ga_instance.population[indices] = solutions
+        solutions = ga_instance.population[indices]  # With the population's dtype
+        if ga_instance.fitness_batch_size not in (None, 1):
+            fitness = ga_instance.fitness_func(ga_instance, solutions, list(indices))
+        else:
+            fitness = [ga_instance.fitness_func(ga_instance, solution, idx) for idx, solution in zip(indices, solutions)]
+        ga_instance.last_generation_fitness[indices] = fitness
+        self.count_evaluations(len(indices))
+
+    def callbacks(self, on_generation=None):
+        """
+        Returns the pygad callback monitoring the run, calling the given on_generation callback first.
+
+        Usage: pygad.GA(..., **monitor.callbacks(on_generation=on_generation))
+        """
+        evaluations_before = [0]  # pygad's evaluation counter at the previous generation
+
+        def monitor_on_generation(ga_instance):
+            result = on_generation(ga_instance) if on_generation is not None else None
+            counted = ga_instance.num_fitness_evaluations
+            evaluations = counted - evaluations_before[0] if counted >= evaluations_before[0] else counted
+            evaluations_before[0] = counted
+            action = self.update(ga_instance.generations_completed - 1, ga_instance.population,
+                                 ga_instance.last_generation_fitness, evaluations)
+            if action == "restart":
+                self._restart_pygad(ga_instance)
+            return "stop" if action == "stop" else result
+
+        return {"on_generation": monitor_on_generation}
@@ -0,0 +1,123 @@
+import hashlib  # Keys of the cache entries
+import json  # Canonical form of the scene parameters
+import sqlite3  # The cache is a single SQLite file, kept between runs
+import time  # Last-use timestamps for the eviction
+
+import numpy as np
+
+# Persistent fitness cache for the pymunk scripts.
+# pygad evaluates kept parents and near-identical offspring again, and every rerun of a script
+# repeats simulations that were already done. A FitnessCache stores each fitness in an SQLite
+# file under a hash of the scene parameters and of the genes rounded to a configurable resolution,
+# so solutions closer than the resolution share a single simulation, in this run or in any later one.
+# Changing a scene parameter (or the fitness function, through its "version") changes every key,
+# so stale results are never returned; the least recently used entries are evicted beyond max_entries.
+# CachedFitness wraps a batch fitness function (typically a PoolEvaluator) and only passes it the misses.
+# The cache is only used from the main process: the workers never open the database.
+
+
+class FitnessCache:
+    """
+    Size-bounded on-disk cache of fitness values.
+
+    Parameters:
+    path: SQLite file holding the cache (created if missing)
+    scene_params: JSON-serializable dict of everything besides the genes that affects the fitness
+                  (scene size, number of frames, a version number of the fitness function, ...)
+    resolution: genes are rounded to multiples of this value before hashing (a number, or one value per gene)
+    max_entries: the least recently used entries are removed beyond this number of entries
+    """
+
+    def __init__(self, path, scene_params, resolution=1e-3, max_entries=100000):
+        self.path = path
+        self.resolution = np.asarray(resolution, dtype=np.float64)
+        self.max_entries = max_entries
+        self.scene_key = json.dumps(scene_params, sort_keys=True).encode()
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS fitness "
+                                "(key TEXT PRIMARY KEY, fitness REAL NOT NULL, last_used REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS fitness_last_used ON fitness (last_used)")
+        self.connection.commit()
+
+    def key(self, solution):
+        """Returns the cache key of a solution: a hash of the scene parameters and of the quantized genes."""
+        quantized = np.round(np.asarray(solution, dtype=np.float64) / self.resolution).astype(np.int64)
+        return hashlib.sha256(self.scene_key + quantized.tobytes()).hexdigest()
+
+    def get_many(self, keys):
+        """Returns a {key: fitness} dict of the keys found in the cache and marks them as used."""
+        found = {}
+        for start in range(0, len(keys), 500):  # Stay below SQLite's limit on query parameters
+            batch = keys[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT key, fitness FROM fitness WHERE key IN ({','.join('?' * len(batch))})", batch)
+            found.update(rows.fetchall())
+        now = time.time()
+        self.connection.executemany("UPDATE fitness SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        self.connection.commit()
+        return found
+
+    def put_many(self, items):
+        """Stores (key, fitness) pairs, then evicts the least recently used entries beyond max_entries."""
+        now = time.time()
+        self.connection.executemany("INSERT OR REPLACE INTO fitness VALUES (?, ?, ?)",
+                                    [(key, float(fitness), now) for key, fitness in items])
+        excess = self.connection.execute("SELECT COUNT(*) FROM fitness").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.connection.execute("DELETE FROM fitness WHERE key IN "
+                                    "(SELECT key FROM fitness ORDER BY last_used LIMIT ?)", (excess,))
+        self.connection.commit()
+
+    def report(self):
+        """Returns a one-line summary of the cache hits so far."""
+        lookups = self.hits + self.misses
+        percent = 100 * self.hits / lookups if lookups else 0
+        entries = self.connection.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+        return (f"Fitness cache: {self.hits}/{lookups} hits ({percent:.1f}%), "
+                f"{entries} entries in {self.path}")
+
+    def close(self):
+        """Closes the database."""
+        self.connection.close()
+
+
+class CachedFitness:
+    """
+    Batch fitness function answering from a FitnessCache and evaluating only the misses.
+
+    Parameters:
+    fitness_func: batch fitness function fitness_func(ga_instance, solutions, solution_indices), e.g. a PoolEvaluator
+    cache: the FitnessCache to read and fill
+    exclude: fitness values never stored, e.g. the penalty of an EvaluationBudget (a timeout depends
+             on the load of the machine, the solution deserves another try in a later run)
+    """
+
+    def __init__(self, fitness_func, cache, exclude=()):
+        self.fitness_func = fitness_func
+        self.cache = cache
+        self.exclude = set(exclude)
+
+    def __call__(self, ga_instance, solutions, solution_indices):
+        """Returns the fitness of every solution, simulating only those missing from the cache."""
+        keys = [self.cache.key(solution) for solution in solutions]
+        found = self.cache.get_many(keys)
+
+        # The same key may appear twice in a batch (duplicate offspring): simulate it once
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in found and key not in missing:
+                missing[key] = i
+        self.cache.hits += len(keys) - len(missing)
+        self.cache.misses += len(missing)
+
+        if missing:
+            rows = list(missing.values())
+            values = self.fitness_func(ga_instance, [solutions[i] for i in rows],
+                                       [solution_indices[i] for i in rows])
+            computed = dict(zip(missing, values))
+            self.cache.put_many((key, value) for key, value in computed.items() if value not in self.exclude)
+            found.update(computed)
+        return [found[key] for key in keys]
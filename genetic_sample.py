@@ -4,6 +4,8 @@ import numpy as np  # For numerical operations (arrays, range generation)
 import matplotlib.pyplot as plt  # For plotting graphs
 import matplotlib.animation as animation  # For creating animated visualizations
 import os
+from instrumentation import Instrumentation  # Per-generation timing of the GA phases (JSONL)
+from adaptive_mutation import SuccessRule  # Adapts the mutation step with the 1/5th success rule
 
 # Define the polynomial function (cubic equation)
 def polynomial(a, b, c, d, x):
@@ -103,13 +105,14 @@ def crossover(parent1, parent2):
 
 
 # Function to apply mutation to an individual
-def mutate(individual, mutation_rate=0.35):
+def mutate(individual, mutation_rate=0.35, step=0.2):
     """
     Mutates an individual by slightly modifying one of its coefficients.
 
     Parameters:
     individual: tuple of polynomial coefficients
     mutation_rate: probability of applying a mutation
+    step: largest relative change of the coefficient (it is scaled by 1 - step to 1 + step)
 
     Returns:
     A mutated individual (or the same individual if no mutation occurs).
@@ -117,13 +120,14 @@ def mutate(individual, mutation_rate=0.35):
     if random.random() < mutation_rate:  # Apply mutation with given probability
         index = random.randint(0, 3)  # Choose a random coefficient to mutate
         mutated = list(individual)
-        mutated[index] *= random.uniform(0.8, 1.2)  # Apply a small random change
+        mutated[index] *= random.uniform(1 - step, 1 + step)  # Apply a small random change
         return tuple(mutated)
     return individual  # Return original if no mutation occurs
 
 
 # Genetic algorithm to evolve a polynomial approximation
-def generate_evolution(population_size, max_generations, function_to_approximate, step_frequency=20):
+def generate_evolution(population_size, max_generations, function_to_approximate, step_frequency=20,
+                       instrumentation=None, monitor=None, success_rule=None):
     """
     Evolves a population of polynomials to approximate a given function using a genetic algorithm.
 
@@ -132,17 +136,39 @@ def generate_evolution(population_size, max_generations, function_to_approximate
     max_generations: number of generations to evolve
     function_to_approximate: the function being approximated (e.g., math.sin)
     step_frequency: how often to store the best solution for visualization
+    instrumentation: optional Instrumentation recording the time of every phase of every generation
+    monitor: optional ConvergenceMonitor stopping (or partially restarting) the evolution once it stalls
+    success_rule: optional SuccessRule adapting the mutation step (fixed at 0.2 without it)
 
     Returns:
     A list of the best individuals at different points in evolution.
     """
+    instrumentation = instrumentation or Instrumentation()  # Disabled by default
     population = generate_population(population_size)  # Generate initial population
     evolution = []  # Store best individuals at specific intervals
+    mutated = []  # (index in the population, fitness of the better parent) of every mutated child
 
     for generation in range(max_generations):
         # Compute fitness scores for all individuals
-        fitness_scores = [fitness_function(*ind, function_to_approximate) for ind in population]
-        # Use *ind to unpack tuple
+        with instrumentation.phase("fitness", evaluations=len(population)):
+            fitness_scores = [fitness_function(*ind, function_to_approximate) for ind in population]
+            # Use *ind to unpack tuple
+
+        # Adapt the mutation step to the share of mutated children fitter than both their parents
+        if success_rule:
+            success_rule.update([parent for _, parent in mutated], [fitness_scores[i] for i, _ in mutated])
+
+        # Stop, or re-initialize the worst individuals, once the best fitness stalls
+        action = monitor.update(generation, population, fitness_scores, len(population)) if monitor else None
+        if action == "stop":
+            evolution.append(population[fitness_scores.index(max(fitness_scores))])  # Last frame: the final best
+            break
+        if action == "restart":
+            restarted = monitor.restart_indices(fitness_scores)
+            for i in restarted:
+                population[i] = generate_individual()
+                fitness_scores[i] = fitness_function(*population[i], function_to_approximate)
+            monitor.count_evaluations(len(restarted))
 
         # Identify the best individual in the population
         best_individual = population[fitness_scores.index(max(fitness_scores))]
@@ -153,21 +179,31 @@ def generate_evolution(population_size, max_generations, function_to_approximate
 
         # Generate next generation through selection, crossover, and mutation
         next_generation = []
+        mutated = []
+        scores = dict(zip(population, fitness_scores)) if success_rule else None  # Fitness of the parents
+        step = success_rule.value if success_rule else 0.2
         while len(next_generation) < population_size:
-            parent1 = tournament_selection(population, fitness_scores)
-            parent2 = tournament_selection(population, fitness_scores)
-            child1, child2 = crossover(parent1, parent2)
-            next_generation.append(mutate(child1))
-            if len(next_generation) < population_size:
-                next_generation.append(mutate(child2))
+            with instrumentation.phase("selection"):
+                parent1 = tournament_selection(population, fitness_scores)
+                parent2 = tournament_selection(population, fitness_scores)
+            with instrumentation.phase("crossover"):
+                child1, child2 = crossover(parent1, parent2)
+            with instrumentation.phase("mutation"):
+                for child in (child1, child2)[:population_size - len(next_generation)]:
+                    mutant = mutate(child, step=step)
+                    if success_rule and mutant is not child:  # mutate() returns the child itself when it does not mutate it
+                        mutated.append((len(next_generation), max(scores[parent1], scores[parent2])))
+                    next_generation.append(mutant)
 
         population = next_generation  # Update population
+        instrumentation.end_generation(generation, fitness_scores)  # Write the record of this generation
 
     return evolution  # Return the stored best individuals over time
 
 
 # Function to animate the polynomial evolution
-def animate_polynomial_approximation(function_to_approximate, population_size=50, max_generations=2000):
+def animate_polynomial_approximation(function_to_approximate, population_size=50, max_generations=2000,
+                                     instrumentation=None, monitor=None, success_rule=None):
     """
     Runs the genetic algorithm and animates the evolution of polynomial approximations.
 
@@ -175,12 +211,21 @@ def animate_polynomial_approximation(function_to_approximate, population_size=50
     function_to_approximate: the target function (e.g., math.sin)
     population_size: number of individuals in the population
     max_generations: total number of generations
+    instrumentation: optional Instrumentation recording the generations and the rendering time
+    monitor: optional ConvergenceMonitor stopping the evolution once it stalls
+    success_rule: optional SuccessRule adapting the mutation step
 
     Returns:
     Animated visualization of the evolution process.
     """
+    instrumentation = instrumentation or Instrumentation()  # Disabled by default
     # Run the genetic algorithm
-    evolution = generate_evolution(population_size, max_generations, function_to_approximate, step_frequency=20)
+    evolution = generate_evolution(population_size, max_generations, function_to_approximate, step_frequency=20,
+                                   instrumentation=instrumentation, monitor=monitor, success_rule=success_rule)
+    if monitor:
+        print(monitor.report())
+    if success_rule:
+        print(success_rule.report())
 
     # Set up the plot
     fig, ax = plt.subplots()
@@ -213,7 +258,9 @@ def animate_polynomial_approximation(function_to_approximate, population_size=50
     output_dir = "polynomial_approximation"
     os.makedirs(output_dir, exist_ok=True)
     # Save the animation as a GIF (optional)
-    ani.save(f'polynomial_approximation/polynomial_approximation_{function_to_approximate.__name__}.gif', writer='imagemagick', fps=30)
+    with instrumentation.phase("rendering"):
+        ani.save(f'polynomial_approximation/polynomial_approximation_{function_to_approximate.__name__}.gif', writer='imagemagick', fps=30)
+    instrumentation.close()
 
     # Show the animation
     plt.show()
@@ -223,5 +270,11 @@ def x_square(x):
     return x*x
 
 
-# Run the algorithm to approximate given function
-animate_polynomial_approximation(math.sin)
+# Only run the GA when executed as a script: benchmark.py imports the fitness function and operators
+if __name__ == "__main__":
+    # Run the algorithm to approximate given function
+    # (pass instrumentation=Instrumentation("polynomial_approximation/instrumentation.jsonl") to time every generation,
+    # monitor=ConvergenceMonitor(2000, window=200, min_improvement=1e-3) to stop once the best fitness has not
+    # improved by 0.1% for 200 generations)
+    # Adapt the mutation step (initially 0.2, between 0.001 and 1) with the 1/5th success rule
+    animate_polynomial_approximation(math.sin, success_rule=SuccessRule(0.2, 0.001, 1.0))
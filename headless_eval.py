@@ -0,0 +1,573 @@
+import math
+import multiprocessing  # Shared counters for the pre-screen report
+
+import numpy as np  # Closed-form trajectories of the pre-screen
+
+from pymunk_scenes import ThrowScene, BoxScene, CollectorScene  # Reusable pymunk worlds for the fitness evaluations
+from trajectory import TrajectoryRecorder  # Record a simulation once, draw it without pymunk
+from timestep import Timing  # Physics timestep, substeps and simulated duration
+from vector_physics import CircleSegmentEngine  # Whole population simulated with NumPy arrays
+
+# Headless fitness functions of the pymunk problems (throw, box and ball collector).
+# The scripts pymunk_throw.py, pymunk_sample.py and pymunk_ball_collector.py set up and run the GA;
+# their fitness functions live here, so the worker processes of a PoolEvaluator or a SteadyStateGA,
+# which import the module of the function they run, only load what a simulation needs: pymunk and
+# numpy, not pygad (most of the import time of the scripts), sqlite3 or the GA settings.
+# pygame, pymunk.pygame_util and Pillow are only imported when a simulation is drawn or saved
+# (see pymunk_render.py). Measure the import cost with: python headless_eval.py
+#
+# Usage: from headless_eval import throw_ball_simulation, simulate_falling_balls, simulate_balls
+
+
+# === Throw (pymunk_throw.py) ===
+
+throw_scene = ThrowScene(800, 600, box_width=100, box_height=100)  # Floor, box and ball are created once
+throw_timing = Timing(dt=1 / 60.0, substeps=1, duration=4.0)  # 240 frames of 1/60 s
+
+
+class BallisticPrescreen:
+    """
+    Closed-form pre-screen for throws that obviously miss.
+
+    Until its first collision the ball follows a parabola, which pymunk integrates exactly as
+    p_k = p_0 + k*v_0*dt + g*dt*dt*k*(k-1)/2 after k steps (a body moves with its velocity before gravity is added).
+    If this free-flight path never comes near the floor or the box during the whole simulation
+    (e.g. the ball flies over the end of the floor), nothing can touch the ball: its final position,
+    and therefore its fitness, is known without running pymunk.
+    Throws whose path comes near a static shape are left to the full simulation.
+
+    A path point counts as near when it is closer to a shape than the radii plus the distance the ball
+    covers in one physics step around that point (for the timing in use) plus the margin,
+    so a path crossing a thin segment between two steps is never missed, whatever dt and substeps.
+
+    Parameters:
+    margin: extra distance (pixels) beyond one step of travel that still counts as near
+            (the path bends slightly between two steps)
+    """
+
+    def __init__(self, margin=5):
+        self.margin = margin
+        self.counters = multiprocessing.Array("q", 2)  # [throws screened, simulations skipped]
+
+    def final_position(self, ball_shape, static_shapes, gravity, num_steps, dt):
+        """
+        Returns the final (x, y) of a throw whose free flight never comes near a static shape.
+
+        Parameters:
+        ball_shape: the ball, already at its start position with its start velocity
+        static_shapes: segments the ball could hit
+        gravity: gravity of the space
+        num_steps: number of physics steps
+        dt: duration of a physics step
+
+        Returns:
+        The position after num_steps steps as a numpy array, or None if the throw must be simulated.
+        """
+        k = np.arange(1, num_steps + 1)[:, None]  # Step numbers, one row per step
+        body = ball_shape.body
+        start = np.array(body.position)
+        path = (start + k * dt * np.array(body.velocity)
+                + np.array(gravity) * dt * dt * k * (k - 1) / 2)
+        # Distance covered in the steps before and after every point (the ball speeds up as it falls):
+        # a shape crossed between two steps is within the length of that step of both points
+        step_lengths = np.linalg.norm(np.diff(path, axis=0, prepend=start[None]), axis=1)
+        reach = np.maximum(step_lengths, np.append(step_lengths[1:], step_lengths[-1]))
+
+        near = False
+        for shape in static_shapes:
+            # Distance from every point of the path to the segment
+            a, b = np.array(shape.a), np.array(shape.b)
+            t = np.clip((path - a) @ (b - a) / np.dot(b - a, b - a), 0, 1)
+            distance = np.linalg.norm(path - (a + t[:, None] * (b - a)), axis=1)
+            if np.any(distance < shape.radius + ball_shape.radius + reach + self.margin):
+                near = True
+                break
+
+        with self.counters.get_lock():
+            self.counters[0] += 1
+            self.counters[1] += not near
+        return None if near else path[-1]
+
+    def report(self):
+        """Returns a one-line summary of the simulations skipped so far."""
+        with self.counters.get_lock():
+            screened, skipped = self.counters[:]
+        percent = 100 * skipped / screened if screened else 0
+        return f"Ballistic pre-screen: {skipped}/{screened} simulations skipped ({percent:.1f}%)"
+
+
+def throw_fitness(ball_x, ball_y, speed, angle_degrees, boxX, boxY, height, box_width, box_height):
+    """Fitness of a throw, given where the ball is at the end of the simulation."""
+    # Compute square of distance from the box for fitness function
+    x_diff = (ball_x - boxX)
+    y_diff = (ball_y - boxY + box_height//2)
+    dist_from_box = x_diff*x_diff + y_diff*y_diff
+
+    # If ball is in box, return 10000 + speed*k1 + angle*k2 as fitness
+    if (boxX - box_width // 2) <= ball_x <= (boxX + box_width // 2) and (height - boxY - box_height) <= ball_y <= (height - boxY):
+        # print("Ball successfully landed inside the box!")
+        return 10000 + speed*0.1 + angle_degrees*4
+
+    return 1 / dist_from_box
+
+
+def throw_ball_simulation(ga_instance, solution, solution_idx, x=100, y=500, boxX=600, boxY=70, draw=False, save_animation=False,
+                          termination=None, prescreen=None, record=None, timing=None, budget=None):
+    """
+    Simulates a ball being thrown.
+    termination: optional early-termination criteria (see early_termination.py)
+    prescreen: optional BallisticPrescreen, scores obvious misses without simulating them
+    record: optional .npz path where the trajectory of the ball is saved (see trajectory.py)
+    timing: optional timestep, substeps and duration (see timestep.py), throw_timing if None
+    budget: optional EvaluationBudget, raises BudgetExceeded when the simulation goes over it (see watchdog.py)
+    """
+    width, height = 800, 600  # Screen size
+    timing = timing or throw_timing
+    
+    box_height = 100
+    box_width = 100
+
+    # Extract solution
+    angle_degrees = solution[0]
+    speed = solution[1]
+
+    # Convert angle to radians and compute velocity components
+    angle_radians = math.radians(angle_degrees)
+    vx = math.cos(angle_radians) * speed
+    vy = -math.sin(angle_radians) * speed  # Negative because Y-axis is downward in Pygame
+
+    # Prepare the Pymunk space: floor, box and ball are reused, only the ball's start state is set
+    space = throw_scene.reset((x, y), (vx, vy), boxX, boxY)
+    ball_body = throw_scene.ball_body
+
+    num_frames = timing.num_frames  # Run for timing.duration seconds
+    dt = timing.step_dt  # Duration of a physics step
+
+    # A throw that never comes near the floor or the box is scored from its closed-form trajectory
+    if prescreen and not (draw or save_animation or record):
+        final_position = prescreen.final_position(throw_scene.ball_shape, [throw_scene.floor, *throw_scene.walls],
+                                                  space.gravity, timing.num_steps, dt)
+        if final_position is not None:
+            ball_x, ball_y = final_position
+            return throw_fitness(ball_x, ball_y, speed, angle_degrees, boxX, boxY, height, box_width, box_height)
+
+    # Rendering (if drawing or saving animation, headless when only saving)
+    renderer = None
+    if draw or save_animation:
+        from pymunk_render import Renderer  # pygame is only imported when drawing or saving
+        renderer = Renderer(width, height, draw, "pymunk_throw/throw_simulation.gif" if save_animation else None,
+                            background=(0, 0, 0), duration=1, fps=round(1 / timing.dt))
+
+    # Simulation loop
+    ball_positions = []
+
+    monitor = termination.start(space, [ball_body], num_frames) if termination else None
+    recorder = TrajectoryRecorder(space, [ball_body], num_frames) if record else None
+    watch = budget.start() if budget else None
+
+    for frame_num in range(num_frames):
+        timing.step(space)  # Step physics simulation (timing.substeps steps per frame)
+        if watch:
+            watch.check((frame_num + 1) * timing.substeps)  # Give up past the time / step budget
+        if recorder:
+            recorder.record()  # Store ball position and angle
+        ball_positions.append((ball_body.position.x, height - ball_body.position.y))  # Store position
+
+        if renderer:
+            renderer.frame(space)  # Draw, and capture the frame in memory if saving
+
+        # Stop once the ball rests in the box, has settled, or flies away from the scene
+        if monitor and monitor.done(frame_num):
+            break
+
+    ball_x, ball_y = ball_body.position
+    if monitor:
+        monitor.finish(frame_num + 1)
+        if monitor.exited[0]:
+            # Nothing can stop the ball anymore: move it to where it would be after num_frames frames.
+            # pymunk moves a body with its velocity before adding gravity, hence n * (n - 1) / 2.
+            n = (num_frames - (frame_num + 1)) * timing.substeps  # Remaining physics steps
+            ball_x += ball_body.velocity.x * n * dt
+            ball_y += ball_body.velocity.y * n * dt + space.gravity.y * dt * dt * n * (n - 1) / 2
+
+    # Close the window and generate the GIF if enabled
+    if renderer:
+        renderer.close()
+
+    fitness = throw_fitness(ball_x, ball_y, speed, angle_degrees, boxX, boxY, height, box_width, box_height)
+    if recorder:
+        recorder.save(record, width, height, timing.dt, solution=solution, fitness=fitness)
+    return fitness
+
+
+def throw_ball_batch_simulation(ga_instance, solutions, solution_indices, x=100, y=500, boxX=600, boxY=70, timing=None):
+    """
+    Simulates the throws of a whole batch of solutions in a single pymunk space and returns their fitness values.
+    The balls share a collision group (see ThrowScene.reset_batch), so they fly through each other and
+    one space.step() advances every throw. No early termination: all frames are simulated.
+    timing: optional timestep, substeps and duration (see timestep.py), throw_timing if None
+    """
+    width, height = 800, 600  # Screen size
+    box_height = 100
+    box_width = 100
+    timing = timing or throw_timing
+
+    # Initial velocity of every throw
+    velocities = []
+    for angle_degrees, speed in solutions:
+        angle_radians = math.radians(angle_degrees)
+        velocities.append((math.cos(angle_radians) * speed, -math.sin(angle_radians) * speed))
+
+    space, balls = throw_scene.reset_batch((x, y), velocities, boxX, boxY)
+    for frame_num in range(timing.num_frames):
+        timing.step(space)
+
+    return [throw_fitness(*ball.position, speed, angle_degrees, boxX, boxY, height, box_width, box_height)
+            for ball, (angle_degrees, speed) in zip(balls, solutions)]
+
+
+def throw_ball_numpy_positions(solutions, x=100, y=500, boxX=600, boxY=70, timing=None):
+    """
+    Simulates all the throws at once with the NumPy engine (see vector_physics.py).
+    The floor, the box walls and their elasticities are read from the pymunk scene, so both engines
+    simulate the same world.
+
+    Returns:
+    The (P, 2) final positions of the balls.
+    """
+    timing = timing or throw_timing
+    solutions = np.asarray(solutions, dtype=np.float64).reshape(-1, 2)
+    angle_radians = np.radians(solutions[:, 0])
+    velocities = np.stack([np.cos(angle_radians), -np.sin(angle_radians)], axis=1) * solutions[:, 1:2]
+
+    space = throw_scene.reset((x, y), (0, 0), boxX, boxY)
+    segments = [throw_scene.floor, *throw_scene.walls]
+    engine = CircleSegmentEngine([(*s.a, *s.b, s.radius) for s in segments], [s.elasticity for s in segments],
+                                 throw_scene.ball_shape.radius, throw_scene.ball_shape.elasticity, space.gravity,
+                                 iterations=space.iterations)
+    positions, _ = engine.simulate(np.tile((x, y), (len(solutions), 1)), velocities, timing.num_steps, timing.step_dt)
+    return positions
+
+
+def throw_ball_numpy_simulation(ga_instance, solutions, solution_indices, x=100, y=500, boxX=600, boxY=70, timing=None):
+    """
+    Batch fitness function simulating the whole batch with the NumPy engine instead of pymunk.
+    timing: optional timestep, substeps and duration (see timestep.py), throw_timing if None
+    """
+    width, height = 800, 600  # Screen size
+    box_height = 100
+    box_width = 100
+    positions = throw_ball_numpy_positions(solutions, x, y, boxX, boxY, timing)
+    return [throw_fitness(ball_x, ball_y, speed, angle_degrees, boxX, boxY, height, box_width, box_height)
+            for (ball_x, ball_y), (angle_degrees, speed) in zip(positions, solutions)]
+
+
+# === Box (pymunk_sample.py) ===
+
+box_scene = BoxScene(800, 600)  # The balls are created once and reused by every simulation
+box_timing = Timing(dt=1 / 60.0, substeps=1, duration=5.0)  # 300 frames of 1/60 s
+
+
+def simulate_falling_balls(ga_instance, solution, solution_idx, *args, termination=None, record=None, timing=None,
+                           budget=None):
+    """Simulates three balls falling into a box and returns the sum of their y-coordinates.
+
+    Args:
+        solution: box width and height
+        termination (Termination): Optional early-termination criteria (see early_termination.py).
+        record (str): Optional .npz path where the trajectory of the balls is saved (see trajectory.py).
+        timing (Timing): Optional timestep, substeps and duration (see timestep.py), box_timing if None.
+        budget (EvaluationBudget): Optional time / step budget, raises BudgetExceeded past it (see watchdog.py).
+    *Args:
+        draw (bool): Whether to render the simulation using Pygame.
+        save_animation (bool): Whether to save frames as images for creating an animation.
+
+    Returns:
+        float: Fitness score for the genetic algorithm.
+    """
+
+    width, height = 800, 600  # Screen dimensions
+    timing = timing or box_timing
+
+    # Extract dimensions from the solution
+    box_width = solution[0]
+    box_height = solution[1]
+
+    # Extract *args if provided
+    if args:
+        draw = args[0]
+        save_animation = args[1]
+    else:
+        draw = False
+        save_animation = False
+
+    # === Prepare the Pymunk Space ===
+    # The balls are built once by the scene template, only the box walls are rebuilt
+    space = box_scene.reset(box_width, box_height)
+    balls = box_scene.balls
+
+    # === Rendering (only if drawing or saving is enabled, headless when only saving) ===
+    renderer = None
+    if draw or save_animation:
+        from pymunk_render import Renderer  # pygame is only imported when drawing or saving
+        renderer = Renderer(width, height, draw, "pymunk_box/simulation.gif" if save_animation else None,
+                            background=(255, 255, 255), duration=16, fps=round(1 / timing.dt))
+
+    # === Simulation Loop ===
+    num_frames = timing.num_frames  # Simulate for timing.duration seconds
+    monitor = termination.start(space, balls, num_frames) if termination else None
+    recorder = TrajectoryRecorder(space, balls, num_frames) if record else None
+    watch = budget.start() if budget else None
+    for frame_num in range(num_frames):
+        timing.step(space)  # Step physics simulation (timing.substeps steps per frame)
+        if watch:
+            watch.check((frame_num + 1) * timing.substeps)  # Give up past the time / step budget
+        if recorder:
+            recorder.record()  # Store ball positions and angles
+
+        # Store ball coordinates
+        ball_positions = [height - ball.position.y for ball in balls]
+
+        if renderer:
+            renderer.frame(space)  # Draw, and capture the frame in memory if saving
+
+        # Stop once every ball has settled or one has fallen out (the fitness can no longer change)
+        if monitor and monitor.done(frame_num):
+            break
+
+    if monitor:
+        monitor.finish(frame_num + 1)
+
+    # === Close the window and generate the GIF if enabled ===
+    if renderer:
+        renderer.close()
+        print("Ball positions:", ball_positions)
+
+    # === Compute Fitness ===
+    fitness = 1 / (box_width * box_height)  # Fitness grows as volume shrinks
+    for pos in ball_positions:
+        if pos < 100:
+            fitness = 0  # Invalidate solution by assigning zero fitness if balls fall out
+
+    if recorder:
+        recorder.save(record, width, height, timing.dt, solution=solution, fitness=fitness)
+
+    return fitness  # Return fitness (minimize volume)
+
+
+def simulate_falling_balls_batch(ga_instance, solutions, solution_indices, timing=None):
+    """Simulates a batch of boxes, up to 32 per pymunk space, and returns their fitness values.
+
+    Every candidate's box and balls are isolated by a collision category (see BoxScene.reset_batch),
+    so one space.step() advances 32 candidates at once. No early termination: all frames are simulated.
+
+    Args:
+        solutions: box width and height of every candidate
+        timing (Timing): Optional timestep, substeps and duration (see timestep.py), box_timing if None.
+
+    Returns:
+        list: Fitness score of every candidate, as simulate_falling_balls() computes it.
+    """
+    height = 600
+    timing = timing or box_timing
+
+    fitness = []
+    for start in range(0, len(solutions), 32):
+        chunk = [(solution[0], solution[1]) for solution in solutions[start:start + 32]]
+        space, balls = box_scene.reset_batch(chunk)
+        for frame_num in range(timing.num_frames):
+            timing.step(space)
+
+        for (box_width, box_height), candidate_balls in zip(chunk, balls):
+            if any(height - ball.position.y < 100 for ball in candidate_balls):
+                fitness.append(0)  # A ball fell out of the box
+            else:
+                fitness.append(1 / (box_width * box_height))
+    return fitness
+
+
+# === Ball collector (pymunk_ball_collector.py) ===
+
+collector_width, collector_height = 900, 600  # Screen dimensions
+collector_timing = Timing(dt=1 / 60.0, substeps=1, duration=400 / 60.0)  # 400 frames of 1/60 s
+_collector_scenes = {}  # Scene of every load used in this process
+
+
+def collector_scene(load=None):
+    """
+    Returns the collector scene (floor, slope and balls created once and reused) of a load.
+    load: None for the 12 balls of the original scene, or (num_balls, ball_radius, cell_size)
+          for generated balls (see CollectorScene)
+    """
+    if load not in _collector_scenes:
+        _collector_scenes[load] = CollectorScene(collector_width, collector_height, *(load or ()))
+    return _collector_scenes[load]
+
+
+def simulate_balls(ga_instance, solution, solution_idx, *args, termination=None, record=None, timing=None, budget=None,
+                   load=None):
+    # termination: optional early-termination criteria (see early_termination.py)
+    # record: optional .npz path where the trajectory of the balls and the arm is saved (see trajectory.py)
+    # timing: optional timestep, substeps and duration (see timestep.py), collector_timing if None
+    # budget: optional EvaluationBudget, raises BudgetExceeded when the simulation goes over it (see watchdog.py)
+    # load: optional (num_balls, ball_radius, cell_size) of a scene with generated balls (see collector_scene)
+    width, height = collector_width, collector_height  # Screen dimensions
+    scene = collector_scene(load)
+    timing = timing or collector_timing
+
+    # Extract *args if provided
+    if args:
+        draw = args[0]
+        save_animation = args[1]
+    else:
+        draw = False
+        save_animation = False
+
+    # Extract solution if provided, otherwise use default
+    if solution is not None:
+        arm_solution = solution[0]
+        w_solution = solution[1]
+        points_solution = solution[2:]
+    else:
+        arm_solution = 250
+        w_solution = 7
+        points_solution = [500, height - 70,
+                           575, height - 125,
+                           640, height - 180,
+                           620, height - 125,
+                           580, height - 70,
+                           735, height - 70,
+                           880, height - 70,
+                           870, height - 185,
+                           880, height - 300,
+                           725, height - 310,
+                           550, height - 300]
+
+    # === Prepare the Pymunk Space ===
+    # Floor, slope and balls are built once by the scene template,
+    # only the arm and its motor (length, speed) and the collector segments are rebuilt
+    w = w_solution  # Define motor angular speed
+    space = scene.reset(arm_solution, w, points_solution)
+    balls = scene.balls
+
+    # Compute total distance between consecutive point pairs to evaluate resource cost
+    total_distance = 0
+    for i in range(0, len(points_solution) - 2, 2):  # step by 2, avoid last->first
+        x1, y1 = points_solution[i], points_solution[i + 1]
+        x2, y2 = points_solution[i + 2], points_solution[i + 3]
+        dist = math.hypot(x2 - x1, y2 - y1)
+        total_distance += dist
+
+    # === Rendering (only if drawing or saving is enabled, headless when only saving) ===
+    renderer = None
+    if draw or save_animation:
+        from pymunk_render import Renderer  # pygame is only imported when drawing or saving
+        renderer = Renderer(width, height, draw, "pymunk_ball_collector/simulation.gif" if save_animation else None,
+                            background=(255, 255, 255), duration=16, fps=round(1 / timing.dt))
+
+    # === Simulation Loop ===
+    num_frames = timing.num_frames  # Simulate for timing.duration seconds
+    monitor = termination.start(space, balls, num_frames) if termination else None
+    recorder = TrajectoryRecorder(space, balls + [scene.arm_body], num_frames) if record else None
+    watch = budget.start() if budget else None
+    for frame_num in range(num_frames):
+        timing.step(space)  # Step physics simulation (timing.substeps steps per frame)
+        if watch:
+            watch.check((frame_num + 1) * timing.substeps)  # Give up past the time / step budget
+        if recorder:
+            recorder.record()  # Store ball and arm positions and angles
+
+        if renderer:
+            renderer.frame(space)  # Draw, and capture the frame in memory if saving
+
+        # Stop once every ball rests in the collector, has settled elsewhere or has left the scene
+        if monitor and monitor.done(frame_num):
+            break
+
+    if monitor:
+        monitor.finish(frame_num + 1)
+
+    # Store ball coordinates, read once: the fitness only needs the final positions
+    ball_positions = [(ball.position.x, height - ball.position.y) for ball in balls]
+
+    # === Close the window and generate the GIF if enabled ===
+    if renderer:
+        renderer.close()
+        print("Ball positions:", ball_positions)
+
+    # === Compute Fitness ===
+    fitness = 0
+
+    for position in ball_positions:
+        if position[0] > 580 and 70 < position[1] < 310:  # x > 580, y between 70 and 310
+            fitness += 1000  # 1000 fitness per ball in box
+
+    # Less material used for box => better fitness
+    # Less motor power used => better fitness
+    k_w = 0.1
+    k_distance = 0.1
+    fitness -= total_distance * k_distance
+    fitness -= w*k_w
+
+    if draw:
+        print(f"Fitness: {fitness}")
+        print(f"Total distance: {total_distance}")
+
+    if recorder:
+        recorder.save(record, width, height, timing.dt, fitness=fitness)
+
+    return fitness
+
+
+def simulate_balls_scenarios(ga_instance, solution, solution_idx, scenarios, timing=None, budget=None, load=None):
+    """
+    Simulates one design under K perturbed scenarios (see robustness.py) and returns its mean fitness.
+    Up to 32 scenarios share one pymunk space (see CollectorScene.reset_scenarios), so one space.step()
+    advances all of them. No early termination: all frames are simulated.
+    scenarios: required dict of "radius", "offset" and "elasticity" arrays, one row per scenario (e.g. from
+               robustness.draw_scenarios; CommonRandomNumbers passes those of the current generation).
+               Use simulate_balls for the single nominal scenario.
+    timing: optional timestep, substeps and duration (see timestep.py), collector_timing if None
+    budget: optional EvaluationBudget covering all the scenarios of the design (see watchdog.py)
+    load: optional (num_balls, ball_radius, cell_size) of a scene with generated balls (see collector_scene)
+    """
+    height = collector_height
+    scene = collector_scene(load)
+    timing = timing or collector_timing
+    watch = budget.start() if budget else None
+    arm_solution, w, points_solution = solution[0], solution[1], solution[2:]
+
+    total_distance = 0
+    for i in range(0, len(points_solution) - 2, 2):
+        total_distance += math.hypot(points_solution[i + 2] - points_solution[i], points_solution[i + 3] - points_solution[i + 1])
+
+    in_box = 0
+    num_scenarios = len(scenarios["radius"])
+    for start in range(0, num_scenarios, 32):
+        chunk = {key: values[start:start + 32] for key, values in scenarios.items()}
+        space, balls, arms = scene.reset_scenarios(arm_solution, w, points_solution, chunk)
+        for frame_num in range(timing.num_frames):
+            timing.step(space)
+            if watch:
+                watch.check((start // 32 * timing.num_frames + frame_num + 1) * timing.substeps)
+        for scenario_balls in balls:
+            for ball in scenario_balls:
+                x, y = ball.position.x, height - ball.position.y
+                in_box += x > 580 and 70 < y < 310  # Same scoring region as simulate_balls
+
+    # Same costs as simulate_balls, with the mean number of balls in the box
+    return 1000 * in_box / num_scenarios - total_distance * 0.1 - w * 0.1
+
+
+if __name__ == "__main__":
+    import subprocess
+    import sys
+
+    # Import time in a fresh interpreter, as a worker process pays it, compared with the scripts
+    for module in ["headless_eval", "pymunk_throw", "pymunk_sample", "pymunk_ball_collector"]:
+        code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+                f"print(round(1000 * (time.perf_counter() - start)), "
+                f"[name for name in ('pygad', 'pygame', 'PIL', 'sqlite3') if name in sys.modules])")
+        milliseconds, loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                              check=True).stdout.split(" ", 1)
+        print(f"import {module}: {milliseconds} ms, also loads {loaded.strip()}")
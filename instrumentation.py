@@ -0,0 +1,222 @@
+import json
+import os
+import time
+
+import numpy as np
+
+# Per-generation instrumentation of the GA runs.
+# Every generation is written as one JSON line: its wall time, the time spent in each phase
+# (fitness, selection, crossover, mutation, ...), the number of fitness evaluations, the fitness
+# cache hits and the best and mean fitness of the population.
+#   - pygad runs: callbacks() chains timing callbacks with the script's own ones. pygad calls them
+#     between its steps (on_fitness, on_parents, on_crossover, on_mutation, on_generation), so the
+#     time between two callbacks is the time of the step in between. fitness() wraps the fitness
+#     function, so the evaluations are timed and counted on their own.
+#   - hand-rolled loops: each step runs in a `with instrumentation.phase(name):` block and the loop
+#     calls end_generation() once per generation.
+# A phase nested in another (e.g. the fitness evaluated during selection) is only counted in the
+# inner one. Time outside any phase goes to "other". Phases after the last generation (e.g.
+# "rendering") are written as one last line, with generation null, by close().
+# Instrumentation(None) is disabled: callbacks() and fitness() return the script's own callbacks and
+# fitness function unchanged, and phase() returns a shared do-nothing context manager.
+
+
+class _Phase:
+    """Context manager timing one phase."""
+
+    __slots__ = ("instrumentation", "name", "evaluations", "start", "nested")
+
+    def __init__(self, instrumentation, name, evaluations):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.evaluations = evaluations
+
+    def __enter__(self):
+        self.nested = 0.0  # Time of the phases nested in this one
+        self.instrumentation._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        instrumentation = self.instrumentation
+        instrumentation._stack.pop()
+        instrumentation._add(self.name, elapsed - self.nested)
+        instrumentation.evaluations += self.evaluations
+        if instrumentation._stack:
+            instrumentation._stack[-1].nested += elapsed
+        else:
+            instrumentation._nested += elapsed
+        return False
+
+
+class _NoPhase:
+    """Do-nothing context manager of a disabled Instrumentation."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_no_phase = _NoPhase()
+
+
+class Instrumentation:
+    """
+    Records the time of every phase of every generation as JSON lines.
+
+    Parameters:
+    path: JSONL file written (overwritten at the first record), None to disable the instrumentation
+    cache: optional FitnessCache (see fitness_cache.py) whose hits are counted per generation
+    """
+
+    def __init__(self, path=None, cache=None):
+        self.path = path
+        self.enabled = path is not None
+        self.cache = cache
+        self._file = None
+        self._stack = []  # Phases currently running, innermost last
+        self._start_generation()
+
+    def _start_generation(self):
+        self.phases = {}  # Phase name: seconds
+        self.evaluations = 0
+        self._cache_hits = self.cache.hits if self.cache is not None else 0
+        self._nested = 0.0  # Time of the outermost phases since the last lap
+        self._start = self._lap = time.perf_counter()
+
+    def _add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def phase(self, name, evaluations=0):
+        """
+        Returns a context manager timing a phase of the current generation.
+
+        Parameters:
+        name: name of the phase
+        evaluations: number of fitness evaluations done in the phase
+        """
+        if not self.enabled:
+            return _no_phase
+        return _Phase(self, name, evaluations)
+
+    def lap(self, name):
+        """Counts the time since the previous lap, less the phases timed meanwhile, in a phase."""
+        now = time.perf_counter()
+        self._add(name, now - self._lap - self._nested)
+        self._lap = now
+        self._nested = 0.0
+
+    def end_generation(self, generation, fitness=None):
+        """
+        Writes the record of a generation and starts the next one.
+
+        Parameters:
+        generation: number of the generation
+        fitness: fitness values of its population (for the best and mean fitness), or None
+        """
+        if not self.enabled:
+            return
+        self.lap("other")
+        record = {"generation": generation, "seconds": time.perf_counter() - self._start, "phases": self.phases,
+                  "evaluations": self.evaluations}
+        if self.cache is not None:
+            record["cache_hits"] = self.cache.hits - self._cache_hits
+        if fitness is not None and len(fitness):
+            fitness = np.asarray(fitness, dtype=np.float64)
+            record["best_fitness"] = float(fitness.max())
+            record["mean_fitness"] = float(fitness.mean())
+        self._write(record)
+        self._start_generation()
+
+    def _write(self, record):
+        if self._file is None:
+            # Opened on the first record: importing a script writes nothing
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "w")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()  # A generation at a time, so a running or killed run can be inspected
+
+    def fitness(self, fitness_func):
+        """Wraps a pygad fitness function (single or batch) to time and count its evaluations."""
+        if not self.enabled:
+            return fitness_func
+
+        def timed_fitness(ga_instance, solutions, solution_indices):
+            evaluations = len(solution_indices) if np.ndim(solution_indices) else 1
+            with self.phase("fitness", evaluations):
+                return fitness_func(ga_instance, solutions, solution_indices)
+
+        return timed_fitness
+
+    def callbacks(self, on_start=None, on_fitness=None, on_parents=None, on_crossover=None, on_mutation=None,
+                  on_generation=None):
+        """
+        Returns the pygad callbacks timing every generation, calling the given callbacks as well.
+
+        Usage: pygad.GA(..., **instrumentation.callbacks(on_generation=on_generation))
+        """
+        if not self.enabled:
+            callbacks = {"on_start": on_start, "on_fitness": on_fitness, "on_parents": on_parents,
+                         "on_crossover": on_crossover, "on_mutation": on_mutation, "on_generation": on_generation}
+            return {name: callback for name, callback in callbacks.items() if callback is not None}
+
+        initial = []  # Set by on_start: the next on_fitness follows the evaluation of the initial population
+
+        def timed_on_start(ga_instance):
+            if on_start is not None:
+                on_start(ga_instance)
+            initial.append(True)
+            self._start_generation()
+
+        def timed_on_fitness(ga_instance, fitness):
+            result = on_fitness(ga_instance, fitness) if on_fitness is not None else None
+            if initial:
+                # Evaluation of the initial (or resumed, see checkpoint.py) population, written as its generation
+                initial.clear()
+                self.end_generation(ga_instance.generations_completed, fitness if result is None else result)
+            else:
+                self.lap("other")
+            return result
+
+        # The script's callback runs first: it is part of the step that just ended (e.g. a repair after mutation).
+        # Its return value is passed on: pygad replaces the parents or the offspring with the arrays returned
+        # by on_parents, on_crossover or on_mutation
+        def timed_on_parents(ga_instance, parents):
+            result = on_parents(ga_instance, parents) if on_parents is not None else None
+            self.lap("selection")
+            return result
+
+        def timed_on_crossover(ga_instance, offspring):
+            result = on_crossover(ga_instance, offspring) if on_crossover is not None else None
+            self.lap("crossover")
+            return result
+
+        def timed_on_mutation(ga_instance, offspring):
+            result = on_mutation(ga_instance, offspring) if on_mutation is not None else None
+            self.lap("mutation")
+            return result
+
+        def timed_on_generation(ga_instance):
+            self.lap("replacement")  # Population update and the evaluation of the new population (fitness phase)
+            result = on_generation(ga_instance) if on_generation is not None else None
+            self.lap("callbacks")
+            self.end_generation(ga_instance.generations_completed, ga_instance.last_generation_fitness)
+            return result
+
+        return {"on_start": timed_on_start, "on_fitness": timed_on_fitness, "on_parents": timed_on_parents,
+                "on_crossover": timed_on_crossover, "on_mutation": timed_on_mutation,
+                "on_generation": timed_on_generation}
+
+    def close(self):
+        """Writes the phases timed after the last generation (e.g. rendering), if any, and closes the file."""
+        if not self.enabled:
+            return
+        self.lap("other")
+        if any(name != "other" for name in self.phases):
+            self._write({"generation": None, "seconds": time.perf_counter() - self._start, "phases": self.phases})
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,93 @@
+import math
+import time
+
+import numpy as np
+
+# Multi-fidelity evaluation for the expensive pymunk fitness functions.
+# Most offspring are clearly worse than the population after a short look at their simulation.
+# A TieredEvaluator runs every candidate through a cheap, low-fidelity evaluation first (e.g. the
+# first 100 frames, or a coarser timestep), and promotes only the best of them to the next tier,
+# up to the full simulation. The fitness of a candidate is the one of the last tier it reached.
+# Fitness values of different tiers are not comparable (a short run scores fewer balls), so
+# a candidate dropped at a tier is capped just below the lowest fitness of the candidates that
+# went further: a design judged on a short run never outranks one judged on the full simulation.
+# The time spent in each tier is measured, so the tier sizes can be tuned for throughput.
+
+
+class Tier:
+    """
+    One level of a TieredEvaluator.
+
+    Parameters:
+    fitness_func: batch fitness function fitness_func(ga_instance, solutions, solution_indices) of this fidelity
+    promote: fraction of the candidates of this tier promoted to the next one (at least one; ignored for the last tier)
+    threshold: optional minimum fitness at this tier for a candidate to be promoted
+    name: name used in the report
+    """
+
+    def __init__(self, fitness_func, promote=0.5, threshold=None, name=None):
+        self.fitness_func = fitness_func
+        self.promote = promote
+        self.threshold = threshold
+        self.name = name
+        self.evaluations = 0
+        self.seconds = 0.0
+
+
+class TieredEvaluator:
+    """
+    Batch fitness function evaluating every candidate at increasing fidelity, keeping the best at each tier.
+
+    Parameters:
+    tiers: list of Tier, cheapest first; the last tier is the full evaluation
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+
+    def __call__(self, ga_instance, solutions, solution_indices):
+        """Returns the fitness of every solution, from the highest tier it was promoted to."""
+        solutions = np.asarray(solutions)
+        n = len(solutions)
+        values = np.empty(n)
+        level = np.zeros(n, dtype=int)  # Last tier reached by each candidate
+        active = np.arange(n)
+
+        for t, tier in enumerate(self.tiers):
+            start = time.perf_counter()
+            values[active] = tier.fitness_func(ga_instance, solutions[active], [solution_indices[i] for i in active])
+            tier.seconds += time.perf_counter() - start
+            tier.evaluations += len(active)
+            level[active] = t
+
+            if t == len(self.tiers) - 1:
+                break
+            # Promote the best fraction (and only those reaching the threshold, if any)
+            best_first = active[np.argsort(-values[active], kind="stable")]
+            promoted = best_first[:max(1, math.ceil(tier.promote * len(active)))]
+            if tier.threshold is not None:
+                promoted = promoted[values[promoted] >= tier.threshold]
+            if len(promoted) == 0:
+                break
+            active = np.sort(promoted)
+
+        # From the highest tier down: cap each tier's drop-outs just below everything that went further
+        floor = math.inf
+        for t in reversed(range(len(self.tiers))):
+            dropped = level == t
+            if not dropped.any():
+                continue
+            if floor < math.inf:
+                values[dropped] = np.minimum(values[dropped], np.nextafter(floor, -math.inf))
+            floor = min(floor, values[dropped].min())
+        return values.tolist()
+
+    def report(self):
+        """Returns a one-line summary of the evaluations and time spent in each tier."""
+        total = sum(tier.seconds for tier in self.tiers)
+        parts = []
+        for t, tier in enumerate(self.tiers):
+            percent = 100 * tier.seconds / total if total else 0
+            parts.append(f"{tier.name or f'tier {t}'}: {tier.evaluations} evaluations, "
+                         f"{tier.seconds:.1f} s ({percent:.0f}%)")
+        return "Multi-fidelity: " + "; ".join(parts)
@@ -0,0 +1,149 @@
+import random
+import statistics
+import sys
+
+import numpy as np
+
+from adaptive_mutation import SuccessRule
+
+# Fitness evaluations needed to reach a target fitness, with the fixed mutation settings of the scripts
+# and with the mutation strength adapted by the 1/5th success rule (adaptive_mutation.py).
+# Every case runs the script's own GA (hand-rolled loop or pygad with the script's settings) once per
+# seed and per mode, and stops it at the first generation whose best fitness reaches the target.
+# Evaluations are counted per generation (the whole population), like ConvergenceMonitor does; runs
+# that never reach the target within the generation budget count as the whole budget and are
+# shown as misses.
+#
+# Usage: python mutation_benchmark.py [seeds] [cases...]
+
+
+class TargetStop:
+    """Takes the place of a ConvergenceMonitor in the hand-rolled loops: stops them at the target fitness."""
+
+    def __init__(self, target):
+        self.target = target
+        self.evaluations = 0
+        self.reached = None  # Evaluations when the target was reached
+
+    def update(self, generation, population, fitness, evaluations=0):
+        self.evaluations += evaluations
+        if max(fitness) >= self.target:
+            self.reached = self.evaluations
+            return "stop"
+        return None
+
+
+def run_pygad(seed, target, success_rule, num_generations, **settings):
+    """Runs pygad until the best fitness reaches the target. Returns the evaluations, or None."""
+    import pygad
+    reached = []
+
+    def stop_at_target(ga_instance):
+        if np.max(ga_instance.last_generation_fitness) >= target:
+            reached.append(ga_instance.num_fitness_evaluations)
+            return "stop"
+
+    if success_rule is None:
+        callbacks = {"on_generation": stop_at_target}
+    else:
+        callbacks = success_rule.callbacks(apply=SuccessRule.apply_random_mutation_step, on_generation=stop_at_target)
+    np.random.seed(seed)
+    random.seed(seed)
+    ga_instance = pygad.GA(num_generations=num_generations, random_seed=seed, suppress_warnings=True,
+                           **settings, **callbacks)
+    ga_instance.run()
+    return reached[0] if reached else None
+
+
+# ======================== CASES ========================
+# Every case function receives a seed and a SuccessRule (None for the fixed settings) and returns the
+# number of evaluations to reach its target, or None if the run ended before.
+
+def polynomial_case(seed, success_rule):
+    """Hand-rolled GA approximating sin(x) (genetic_sample.py): fitness 40, population 50, 2000 generations."""
+    import math
+    import genetic_sample as script
+    random.seed(seed)
+    stop = TargetStop(40)
+    script.generate_evolution(50, 2000, math.sin, monitor=stop, success_rule=success_rule)
+    return stop.reached
+
+
+def knapsack_case(seed, success_rule):
+    """Hand-rolled knapsack (genetic_knapsack.py): 90% of the greedy value, 500 generations."""
+    state = random.getstate()
+    random.seed(0)  # The script draws its items when imported: same items for every run
+    import genetic_knapsack as script
+    random.setstate(state)
+    greedy_value = greedy_weight = 0
+    for value, weight in sorted(script.items, key=lambda item: -item[0] / item[1]):
+        if greedy_weight + weight <= script.W:
+            greedy_value += value
+            greedy_weight += weight
+    script.SUCCESS_RULE = success_rule
+    random.seed(seed)
+    stop = TargetStop(0.9 * greedy_value)
+    script.genetic_algorithm(stop)
+    return stop.reached
+
+
+def polynomial_pygad_case(seed, success_rule):
+    """pygad polynomial (pygad_sample.py): fitness 0.55, 1000 generations."""
+    import pygad_sample as script
+    return run_pygad(seed, 0.55, success_rule, script.num_generations, fitness_func=script.fitness_func,
+                     num_parents_mating=script.num_parents_mating, sol_per_pop=script.sol_per_pop,
+                     num_genes=script.num_genes, init_range_low=script.init_range_low,
+                     init_range_high=script.init_range_high, parent_selection_type=script.parent_selection_type,
+                     keep_parents=script.keep_parents, crossover_type=script.crossover_type,
+                     mutation_type=script.mutation_type, mutation_percent_genes=script.mutation_percent_genes)
+
+
+def points_case(seed, success_rule):
+    """pygad polynomial through points (pygad_points_approximation.py): fitness 0.8, 1000 generations."""
+    import pygad_points_approximation as script
+    return run_pygad(seed, 0.8, success_rule, script.num_generations, fitness_func=script.fitness_func,
+                     num_parents_mating=script.num_parents_mating, sol_per_pop=script.sol_per_pop,
+                     num_genes=script.num_genes, init_range_low=script.init_range_low,
+                     init_range_high=script.init_range_high, parent_selection_type=script.parent_selection_type,
+                     keep_parents=script.keep_parents, crossover_type=script.crossover_type,
+                     mutation_type=script.mutation_type, mutation_percent_genes=script.mutation_percent_genes,
+                     fitness_batch_size=script.fitness_batch_size)
+
+
+def box_case(seed, success_rule):
+    """Box of falling balls (pymunk_sample.py, batched spaces): box area under 12000 px², 150 generations."""
+    import pymunk_sample as script
+    return run_pygad(seed, 1 / 12000, success_rule, 150, fitness_func=script.simulate_falling_balls_batch,
+                     num_parents_mating=script.num_parents_mating, sol_per_pop=script.sol_per_pop,
+                     num_genes=script.num_genes, init_range_low=script.init_range_low,
+                     init_range_high=script.init_range_high, parent_selection_type=script.parent_selection_type,
+                     keep_parents=script.keep_parents, crossover_type=script.crossover_type,
+                     mutation_type=script.mutation_type, mutation_percent_genes=script.mutation_percent_genes,
+                     fitness_batch_size=script.fitness_batch_size)
+
+
+# Name: (case function, success rule factory, evaluation budget of a run)
+cases = {
+    "polynomial": (polynomial_case, lambda: SuccessRule(0.2, 0.001, 1.0), 2000 * 50),
+    "knapsack": (knapsack_case, lambda: SuccessRule(0.1, 0.01, 1.0), 500 * 100),
+    "polynomial_pygad": (polynomial_pygad_case, lambda: SuccessRule(1.0, 0.001, 10.0), 1000 * 20),
+    "points": (points_case, lambda: SuccessRule(1.0, 0.001, 10.0), 1000 * 20),
+    "box": (box_case, lambda: SuccessRule(1.0, 0.01, 100.0), 150 * 20),
+}
+
+
+if __name__ == "__main__":
+    num_seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    names = sys.argv[2:] or list(cases)
+
+    print(f"Evaluations to reach the target, median over {num_seeds} seeds (misses count as the budget)")
+    print(f"{'case':<18}{'fixed':>10}{'misses':>8}{'adaptive':>10}{'misses':>8}{'ratio':>8}")
+    for name in names:
+        case_func, make_rule, budget = cases[name]
+        medians, misses = [], []
+        for adaptive in (False, True):
+            evaluations = [case_func(seed, make_rule() if adaptive else None) for seed in range(num_seeds)]
+            misses.append(sum(reached is None for reached in evaluations))
+            medians.append(statistics.median(budget if reached is None else reached for reached in evaluations))
+        print(f"{name:<18}{medians[0]:>10.0f}{misses[0]:>8}{medians[1]:>10.0f}{misses[1]:>8}{medians[1] / medians[0]:>8.2f}",
+              flush=True)
@@ -0,0 +1,179 @@
+import itertools  # Numbers of the tasks watched by a deadline
+import multiprocessing  # For the persistent pool of worker processes
+import queue  # queue.Empty, raised by multiprocessing queues
+import time  # Start times of the tasks watched by a deadline
+
+from watchdog import BudgetExceeded  # Raised by fitness functions going over their evaluation budget
+
+# Parallel fitness evaluation for the pymunk scripts.
+# A PoolEvaluator is passed to pygad as a batch fitness function (fitness_batch_size=sol_per_pop):
+# pygad hands it the whole population, the pool spreads the simulations over all cores,
+# and the fitness values come back in population order.
+# The pool is created once and reused for every generation. Each worker receives the fitness
+# function (and its extra arguments) only once, in its initializer, and keeps its imports
+# (pymunk, pygame, ...) loaded between tasks, so a task only carries one solution (and the
+# keyword arguments overridden for this call, if any: e.g. a shorter timing for a quick evaluation).
+# With an EvaluationBudget (see watchdog.py), evaluations over budget get its penalty fitness, and
+# a worker that does not return in time is killed together with its pool, which is started again.
+# The deadline counts from the moment a worker starts the evaluation (each worker posts the start time of
+# its tasks to a queue), so the time a task spends queued behind the others never counts against it.
+
+# Fitness function and extra arguments of the current worker process (set by _init_worker)
+_worker_fitness_func = None
+_worker_args = ()
+_worker_kwargs = {}
+_worker_started = None  # Queue receiving the (task number, start time) of the tasks watched by a deadline
+
+
+def _init_worker(fitness_func, args, kwargs, started=None):
+    """Runs once in every worker process: stores the fitness function used by all its tasks."""
+    global _worker_fitness_func, _worker_args, _worker_kwargs, _worker_started
+    _worker_fitness_func = fitness_func
+    _worker_args = args
+    _worker_kwargs = kwargs
+    _worker_started = started
+
+
+def _call(fitness_func, ga_instance, solution, solution_idx, args, kwargs):
+    """Calls the fitness function, scoring an evaluation over its budget with the penalty fitness."""
+    try:
+        return fitness_func(ga_instance, solution, solution_idx, *args, **kwargs)
+    except BudgetExceeded as exceeded:
+        return kwargs["budget"].timed_out(solution, str(exceeded))
+
+
+def _evaluate(task):
+    """Evaluates one (solution_idx, solution, overridden kwargs) task in a worker process."""
+    solution_idx, solution, overrides = task
+    # The GA instance stays in the main process, fitness functions here don't use it
+    return _call(_worker_fitness_func, None, solution, solution_idx, _worker_args, {**_worker_kwargs, **overrides})
+
+
+def _evaluate_timed(numbered_task):
+    """Evaluates a (task number, task) pair, posting its start time for the deadline of the main process."""
+    number, task = numbered_task
+    _worker_started.put((number, time.time()))
+    return _evaluate(task)
+
+
+class PoolEvaluator:
+    """
+    Batch fitness function evaluating solutions in a persistent process pool.
+
+    Parameters:
+    fitness_func: pygad-style fitness function fitness_func(ga_instance, solution, solution_idx, *args).
+                  It must be defined at module level so it can be sent to the workers.
+    processes: number of worker processes (defaults to the number of cores). 1 evaluates serially
+               in the current process, without starting a pool.
+    args: extra positional arguments passed to every fitness_func call
+    kwargs: extra keyword arguments passed to every fitness_func call. They are sent once per worker,
+            so they may hold shared multiprocessing objects (e.g. the counters of a Termination).
+    budget: optional EvaluationBudget (see watchdog.py), passed to every fitness_func call as budget=...
+    """
+
+    def __init__(self, fitness_func, processes=None, args=(), kwargs=None, budget=None):
+        self.fitness_func = fitness_func
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.budget = budget
+        if budget is not None:
+            self.kwargs["budget"] = budget
+        self.processes = processes or multiprocessing.cpu_count()
+        self.pool = None
+        self.started = None  # Queue of the start times posted by the workers (deadline mode only)
+        self.start_times = {}  # Task number: start time, read from self.started
+        self.task_numbers = itertools.count()  # Unique across batches, so late start times never match a new task
+        self.first_number = 0  # Number of the first task of the current submission: earlier start times are dropped
+        if self.processes > 1:
+            self._start_pool()
+
+    def _start_pool(self):
+        if self.budget is not None and self.budget.kill_after is not None:
+            # A new queue with every pool: a worker killed while posting could leave the old one locked
+            self.started = multiprocessing.Queue()
+            self.start_times = {}
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                         initargs=(self.fitness_func, self.args, self.kwargs, self.started))
+
+    def _wait(self, async_result, number):
+        """Waits for a task until kill_after seconds after its start. Returns False if it is late."""
+        kill_after = self.budget.kill_after
+        while not async_result.ready():
+            start = self.start_times.get(number)
+            if start is None:
+                # Not started yet (or its start time is still in the queue): the clock does not run
+                try:
+                    started_number, started_time = self.started.get(timeout=kill_after)
+                    if started_number >= self.first_number:  # Not a task of an earlier batch read late
+                        self.start_times[started_number] = started_time
+                except queue.Empty:
+                    pass
+                continue
+            remaining = start + kill_after - time.time()
+            if remaining <= 0:
+                return False
+            async_result.wait(remaining)
+        return True
+
+    def __call__(self, ga_instance, solutions, solution_indices, **overrides):
+        """
+        Evaluates a batch of solutions and returns their fitness values in the same order.
+        overrides: keyword arguments replacing some of the kwargs for this batch only
+        """
+        tasks = [(idx, solution, overrides) for idx, solution in zip(solution_indices, solutions)]
+        if self.pool is None:
+            kwargs = {**self.kwargs, **overrides}
+            return [_call(self.fitness_func, ga_instance, solution, idx, self.args, kwargs) for idx, solution, _ in tasks]
+        if self.budget is not None and self.budget.kill_after is not None:
+            return self._map_with_deadline(tasks)
+        chunksize = max(1, len(tasks) // (4 * self.processes))  # A few chunks per worker balances uneven costs
+        return self.pool.map(_evaluate, tasks, chunksize=chunksize)  # map() keeps the population order
+
+    def _map_with_deadline(self, tasks):
+        """Evaluates the tasks one per pool task, killing the pool when a worker does not return in time."""
+        results = [None] * len(tasks)
+        pending = list(range(len(tasks)))
+        while pending:
+            numbers = {i: next(self.task_numbers) for i in pending}
+            self.first_number = numbers[pending[0]]
+            async_results = {i: self.pool.apply_async(_evaluate_timed, ((numbers[i], tasks[i]),)) for i in pending}
+            for n, i in enumerate(pending):
+                if self._wait(async_results[i], numbers[i]):
+                    results[i] = async_results[i].get()
+                    self.start_times.pop(numbers[i], None)
+                else:
+                    results[i] = self.budget.timed_out(tasks[i][1], f"no result {self.budget.kill_after} s after "
+                                                                    f"its start", killed=True)
+                    # Keep what the other workers already finished, resubmit the rest to a new pool
+                    rest = [j for j in pending[n + 1:] if not async_results[j].ready()]
+                    for j in pending[n + 1:]:
+                        if async_results[j].ready():
+                            results[j] = async_results[j].get()
+                    self.pool.terminate()
+                    self.pool.join()
+                    self._start_pool()
+                    pending = rest
+                    break
+            else:
+                pending = []
+        # Drop the start times of the tasks that finished before being waited for, read or still queued
+        self.start_times.clear()
+        try:
+            while True:
+                self.started.get_nowait()
+        except queue.Empty:
+            pass
+        return results
+
+    def close(self):
+        """Stops the worker processes."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
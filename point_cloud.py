@@ -0,0 +1,94 @@
+import numpy as np  # Numpy is used for memory mapping and vectorized polynomial evaluation
+
+# Helpers shared by the pygad points-approximation scripts.
+# They let the fitness be computed over millions of (x, y) samples stored on disk:
+# the file is memory-mapped (never fully loaded), and the error of the whole population
+# is accumulated chunk by chunk, so memory use is bounded by population_size * chunk_size.
+
+
+def load_points(path, dtype=np.float64):
+    """
+    Opens a point file as a read-only memory-mapped (n, 2) array of (x, y) samples.
+
+    Parameters:
+    path: either a .npy file holding an (n, 2) array, or a raw binary file of interleaved x, y values
+    dtype: element type of a raw binary file (ignored for .npy files, which store their own dtype)
+
+    Returns:
+    A memory-mapped (n, 2) array. Pages are only read from disk when a chunk is accessed.
+    """
+    if str(path).endswith(".npy"):
+        points = np.load(path, mmap_mode="r")
+    else:
+        points = np.memmap(path, dtype=dtype, mode="r")
+        points = points.reshape(-1, 2)  # Interleaved x, y pairs
+
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"Expected an (n, 2) array of points in {path}, got shape {points.shape}")
+    return points
+
+
+def horner(coefficients, x):
+    """
+    Evaluates one polynomial per row of coefficients at every x using Horner's scheme.
+
+    Parameters:
+    coefficients: (population_size, degree + 1) array, highest power first (a, b, c, d for a cubic)
+    x: 1D array of sample positions
+
+    Returns:
+    A (population_size, len(x)) array of polynomial values.
+    """
+    values = np.empty((coefficients.shape[0], x.shape[0]), dtype=x.dtype)
+    values[:] = coefficients[:, :1]  # Start with the leading coefficient
+    for k in range(1, coefficients.shape[1]):
+        values *= x  # values = values * x + next coefficient
+        values += coefficients[:, k:k + 1]
+    return values
+
+
+def squared_error(coefficients, points, chunk_size=65536, use_float32=False):
+    """
+    Computes the sum of squared errors of every polynomial in a population over all points.
+
+    Parameters:
+    coefficients: (population_size, degree + 1) array of polynomial coefficients
+    points: (n, 2) array of (x, y) samples, typically the memory-mapped array from load_points()
+    chunk_size: number of samples evaluated at once; bounds memory to population_size * chunk_size values
+    use_float32: evaluate and sum each chunk in float32 (about twice the throughput, less precise)
+
+    Returns:
+    A 1D float64 array with the accumulated squared error of each polynomial.
+    """
+    dtype = np.float32 if use_float32 else np.float64
+    coefficients = np.atleast_2d(np.asarray(coefficients, dtype=dtype))
+    error = np.zeros(coefficients.shape[0], dtype=np.float64)
+
+    for start in range(0, len(points), chunk_size):
+        chunk = np.asarray(points[start:start + chunk_size], dtype=dtype)  # Reads only this chunk from disk
+        residuals = horner(coefficients, chunk[:, 0])
+        residuals -= chunk[:, 1]
+        residuals *= residuals
+        # Per-chunk partial sums are added in float64, so rounding error does not grow with the file size
+        error += residuals.sum(axis=1, dtype=dtype)
+
+    return error
+
+
+def x_range(points, chunk_size=65536):
+    """
+    Finds the smallest and largest x of a (possibly memory-mapped) point array, chunk by chunk.
+
+    Parameters:
+    points: (n, 2) array of (x, y) samples
+    chunk_size: number of samples read at once
+
+    Returns:
+    A tuple (x_min, x_max).
+    """
+    x_min, x_max = np.inf, -np.inf
+    for start in range(0, len(points), chunk_size):
+        x = points[start:start + chunk_size, 0]
+        x_min = min(x_min, float(x.min()))
+        x_max = max(x_max, float(x.max()))
+    return x_min, x_max
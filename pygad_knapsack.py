@@ -1,6 +1,8 @@
 import pygad
 import random
 import numpy as np
+from convergence import ConvergenceMonitor  # Stops the run once the best fitness stalls
+from instrumentation import Instrumentation  # Per-generation timing of the GA phases (JSONL)
 
 # ======================== PROBLEM PARAMETERS ========================
 N = 100  # Number of available items
@@ -40,6 +42,14 @@ num_genes = N
 # Enforce strictly binary initial population
 initial_population = np.random.choice([0, 1], size=(sol_per_pop, num_genes)).astype(int)
 
+# Write the time of every GA phase (fitness, selection, crossover, mutation, ...), the evaluations
+# and the best/mean fitness of every generation as JSON lines (see instrumentation.py), None to disable
+instrumentation_path = None  # e.g. "knapsack_instrumentation.jsonl"
+
+# Stop the run once the best fitness has not improved for stall_window generations (see convergence.py),
+# e.g. 50. None runs all the generations
+stall_window = None
+
 
 # Custom mutation function (bit-flip mutation)
 def binary_mutation(offspring, ga_instance):
@@ -49,33 +59,42 @@ def binary_mutation(offspring, ga_instance):
     return offspring
 
 
-ga_instance = pygad.GA(
-    num_generations=num_generations,
-    num_parents_mating=num_parents_mating,
-    fitness_func=fitness_func,
-    sol_per_pop=sol_per_pop,
-    num_genes=num_genes,
-    parent_selection_type="sss",
-    keep_parents=2,
-    crossover_type="single_point",
-    mutation_type=binary_mutation,  # Use custom mutation
-    initial_population=initial_population
-)
-
-# ======================== RUN GA ========================
-ga_instance.run()  # Start the genetic algorithm
-
-# ======================== OUTPUT RESULTS ========================
-solution, solution_fitness, solution_idx = ga_instance.best_solution()
-binary_solution = np.round(solution).astype(int)  # Convert to strictly binary values
-
-print("Best solution:")
-print("[", end="")
-for idx in range(N):
-    if round(solution[idx]) == 1:
-        print("█", end="")
-    else:
-        print(" ", end="")
-print("]")
-print(f"Best solution fitness: {solution_fitness}")
-print(f"Total weight of items picked: {weight(solution)} / {W}")
+# Only run the GA when executed as a script: benchmark.py imports the fitness function and operators
+if __name__ == "__main__":
+    instrumentation = Instrumentation(instrumentation_path)
+    # Restarts (action="restart") draw binary solutions, like the bit-flip mutation keeps them
+    monitor = ConvergenceMonitor(num_generations, stall_window or num_generations,
+                                 random_solutions=lambda count: np.random.choice([0, 1], size=(count, num_genes)))
+    ga_instance = pygad.GA(
+        num_generations=num_generations,
+        num_parents_mating=num_parents_mating,
+        fitness_func=instrumentation.fitness(fitness_func),
+        sol_per_pop=sol_per_pop,
+        num_genes=num_genes,
+        parent_selection_type="sss",
+        keep_parents=2,
+        crossover_type="single_point",
+        mutation_type=binary_mutation,  # Use custom mutation
+        initial_population=initial_population,
+        **instrumentation.callbacks(**monitor.callbacks())  # Stops the run once it stalls, timing of every generation
+    )
+
+    # ======================== RUN GA ========================
+    ga_instance.run()  # Start the genetic algorithm
+    instrumentation.close()
+    print(monitor.report())
+
+    # ======================== OUTPUT RESULTS ========================
+    solution, solution_fitness, solution_idx = ga_instance.best_solution()
+    binary_solution = np.round(solution).astype(int)  # Convert to strictly binary values
+
+    print("Best solution:")
+    print("[", end="")
+    for idx in range(N):
+        if round(solution[idx]) == 1:
+            print("█", end="")
+        else:
+            print(" ", end="")
+    print("]")
+    print(f"Best solution fitness: {solution_fitness}")
+    print(f"Total weight of items picked: {weight(solution)} / {W}")
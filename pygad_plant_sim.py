@@ -4,6 +4,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import math
 import os
+from checkpoint import Checkpoint  # Periodic checkpoints, an interrupted run resumes from the last one
+from convergence import ConvergenceMonitor  # Stops the training once the best fitness stalls
+from instrumentation import Instrumentation  # Per-generation timing of the GA phases (JSONL)
 
 # ======================== PROBLEM PARAMETERS ========================
 N = 2000  # Number of available items (days)
@@ -69,86 +72,116 @@ num_genes = N
 # Strictly binary initial population
 initial_population = [np.ones(N) for _ in range(sol_per_pop)]  # Initialize all ones
 
-ga_instance = pygad.GA(
-    num_generations=num_generations,
-    num_parents_mating=num_parents_mating,
-    fitness_func=lambda ga, sol, idx: fitness_func(ga, sol, idx),  # Fitness function only returns revenue
-    sol_per_pop=sol_per_pop,
-    num_genes=num_genes,
-    parent_selection_type="random",
-    keep_parents=4,
-    crossover_type="single_point",
-    mutation_type=binary_mutation,  # Use custom mutation
-    initial_population=initial_population
-)
-
-# ======================== RUN GA ========================
-ga_instance.run()  # Start the genetic algorithm
-
-# ======================== SECONDARY TRAINING WITH STEADY-STATE SELECTION ========================
-solution, solution_fitness, solution_idx = ga_instance.best_solution()
-
-ga_instance = pygad.GA(
-    num_generations=num_generations//2,
-    num_parents_mating=num_parents_mating,
-    fitness_func=lambda ga, sol, idx: fitness_func(ga, sol, idx),  # Fitness function only returns revenue
-    sol_per_pop=sol_per_pop,
-    num_genes=num_genes,
-    parent_selection_type="sss",  # Steady-State Selection
-    keep_parents=4,
-    crossover_type="single_point",
-    mutation_type=binary_mutation,  # Use custom mutation
-    initial_population=[solution for _ in range(sol_per_pop)]
-)
-
-# ======================== OUTPUT RESULTS ========================
-solution, solution_fitness, solution_idx = ga_instance.best_solution()
-binary_solution = np.round(solution).astype(int)  # Convert to strictly binary values
-
-# Compute revenue over time for best solution
-_, revenue_over_time = fitness_func(ga_instance, binary_solution, solution_idx, return_revenue_curve=True)
-
-# Print solution and fitness
-print("Best solution:")
-print("[" + "".join("█" if binary_solution[idx] else " " for idx in range(N)) + "]")
-print(f"Best solution fitness: {solution_fitness}")
-
-# Compare with a full-time operation scenario
-non_stop_fitness, _ = fitness_func(ga_instance, np.ones(N), solution_idx, return_revenue_curve=True)
-print(f"Fitness of non-stop solution: {non_stop_fitness}")
-
-# ======================== PLOTTING ========================
-fig, ax = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
-
-# Plot 1: Electricity Prices + Running Periods
-ax[0].plot(prices, label="Electricity Price ($)", color="blue", linestyle="dashed", alpha=0.7)
-ax[0].plot([prod_per_day for _ in range(N)], label="Daily revenue (ignoring electricity prices) ($)", color="orange", alpha=0.7)
-ax[0].fill_between(range(N), prices, where=binary_solution == 1, color="green", alpha=0.3, label="Plant Running")
-ax[0].set_ylabel("Price ($)")
-ax[0].set_title("Electricity Prices Over Time (Shaded = Running Periods)")
-ax[0].legend()
-ax[0].grid()
-
-# Plot 2: Revenue Accumulation
-ax[1].plot(revenue_over_time, label="Cumulative Revenue (Best Solution)", color="red", linewidth=2)
-# Compute non-stop solution revenue over time
-non_stop_solution = np.ones(N)  # Plant runs all the time
-_, non_stop_revenue_over_time = fitness_func(ga_instance, non_stop_solution, solution_idx, return_revenue_curve=True)
-ax[1].plot(non_stop_revenue_over_time, label="Cumulative Revenue (Non-Stop Solution)", color="blue", linestyle="--", linewidth=2)
-ax[1].set_xlabel("Day")
-ax[1].set_ylabel("Revenue ($)")
-ax[1].set_title("Revenue Over Time for Best Solution vs Non-Stop Solution")
-ax[1].legend()
-ax[1].grid()
-
-plt.tight_layout()
-plt.show()
-
-# Create directory if it doesn't exist
-output_dir = "plant_sim"
-os.makedirs(output_dir, exist_ok=True)
-
-# Save the figure
-output_path = os.path.join(output_dir, "plant_simulation.png")
-fig.savefig(output_path, dpi=300)
-print(f"Plot saved to {output_path}")
\ No newline at end of file
+# Save the population, its fitness, the random generator states and the generation number of the
+# run every 25 generations. Running the script again after a crash resumes from the last checkpoint
+# without evaluating the population again; the checkpoint is deleted once the results are saved.
+checkpoint_every = 25
+checkpoint = Checkpoint(os.path.join("plant_sim", "checkpoint.npz"), checkpoint_every)
+
+# Write the time of every GA phase (fitness, selection, crossover, mutation, ...), the evaluations
+# and the best/mean fitness of every generation as JSON lines (see instrumentation.py), None to disable
+instrumentation_path = None  # e.g. os.path.join("plant_sim", "instrumentation.jsonl")
+
+# Stop the training once the best fitness has not improved for stall_window generations
+# (see convergence.py), None to run all the generations. The fitness climbs in steps separated by
+# long plateaus (over 100 generations), so the window must be long, e.g. 200.
+stall_window = None
+
+# Only run the GA when executed as a script: benchmark.py imports the fitness function and operators
+if __name__ == "__main__":
+    instrumentation = Instrumentation(instrumentation_path)
+    # Restarts (action="restart") draw binary solutions, like the bit-flip mutation keeps them
+    monitor = ConvergenceMonitor(num_generations, stall_window or num_generations,
+                                 random_solutions=lambda count: np.random.choice([0, 1], size=(count, num_genes)))
+    ga_instance = pygad.GA(
+        num_generations=num_generations,
+        num_parents_mating=num_parents_mating,
+        fitness_func=checkpoint.fitness(instrumentation.fitness(lambda ga, sol, idx: fitness_func(ga, sol, idx))),  # Fitness function only returns revenue
+        sol_per_pop=sol_per_pop,
+        num_genes=num_genes,
+        parent_selection_type="random",
+        keep_parents=4,
+        crossover_type="single_point",
+        mutation_type=binary_mutation,  # Use custom mutation
+        initial_population=initial_population,
+        # Stop once stalled, save a checkpoint every checkpoint_every generations, timing of every generation
+        **instrumentation.callbacks(**checkpoint.callbacks(**monitor.callbacks()))
+    )
+
+    # ======================== RUN GA ========================
+    if checkpoint.resume(ga_instance):  # Only the generations left after the last checkpoint are run
+        print(f"Resuming from generation {ga_instance.generations_completed} ({checkpoint.path})")
+    ga_instance.run()  # Start the genetic algorithm
+    instrumentation.close()
+    print(monitor.report())
+
+    # ======================== SECONDARY TRAINING WITH STEADY-STATE SELECTION ========================
+    solution, solution_fitness, solution_idx = ga_instance.best_solution(ga_instance.last_generation_fitness)
+
+    ga_instance = pygad.GA(
+        num_generations=num_generations//2,
+        num_parents_mating=num_parents_mating,
+        fitness_func=lambda ga, sol, idx: fitness_func(ga, sol, idx),  # Fitness function only returns revenue
+        sol_per_pop=sol_per_pop,
+        num_genes=num_genes,
+        parent_selection_type="sss",  # Steady-State Selection
+        keep_parents=4,
+        crossover_type="single_point",
+        mutation_type=binary_mutation,  # Use custom mutation
+        initial_population=[solution for _ in range(sol_per_pop)]
+    )
+
+    # ======================== OUTPUT RESULTS ========================
+    solution, solution_fitness, solution_idx = ga_instance.best_solution()
+    binary_solution = np.round(solution).astype(int)  # Convert to strictly binary values
+
+    # Compute revenue over time for best solution
+    _, revenue_over_time = fitness_func(ga_instance, binary_solution, solution_idx, return_revenue_curve=True)
+
+    # Print solution and fitness
+    print("Best solution:")
+    print("[" + "".join("█" if binary_solution[idx] else " " for idx in range(N)) + "]")
+    print(f"Best solution fitness: {solution_fitness}")
+
+    # Compare with a full-time operation scenario
+    non_stop_fitness, _ = fitness_func(ga_instance, np.ones(N), solution_idx, return_revenue_curve=True)
+    print(f"Fitness of non-stop solution: {non_stop_fitness}")
+
+    # ======================== PLOTTING ========================
+    fig, ax = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+
+    # Plot 1: Electricity Prices + Running Periods
+    ax[0].plot(prices, label="Electricity Price ($)", color="blue", linestyle="dashed", alpha=0.7)
+    ax[0].plot([prod_per_day for _ in range(N)], label="Daily revenue (ignoring electricity prices) ($)", color="orange", alpha=0.7)
+    ax[0].fill_between(range(N), prices, where=binary_solution == 1, color="green", alpha=0.3, label="Plant Running")
+    ax[0].set_ylabel("Price ($)")
+    ax[0].set_title("Electricity Prices Over Time (Shaded = Running Periods)")
+    ax[0].legend()
+    ax[0].grid()
+
+    # Plot 2: Revenue Accumulation
+    ax[1].plot(revenue_over_time, label="Cumulative Revenue (Best Solution)", color="red", linewidth=2)
+    # Compute non-stop solution revenue over time
+    non_stop_solution = np.ones(N)  # Plant runs all the time
+    _, non_stop_revenue_over_time = fitness_func(ga_instance, non_stop_solution, solution_idx, return_revenue_curve=True)
+    ax[1].plot(non_stop_revenue_over_time, label="Cumulative Revenue (Non-Stop Solution)", color="blue", linestyle="--", linewidth=2)
+    ax[1].set_xlabel("Day")
+    ax[1].set_ylabel("Revenue ($)")
+    ax[1].set_title("Revenue Over Time for Best Solution vs Non-Stop Solution")
+    ax[1].legend()
+    ax[1].grid()
+
+    plt.tight_layout()
+    plt.show()
+
+    # Create directory if it doesn't exist
+    output_dir = "plant_sim"
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Save the figure
+    output_path = os.path.join(output_dir, "plant_simulation.png")
+    fig.savefig(output_path, dpi=300)
+    print(f"Plot saved to {output_path}")
+
+    # The run is complete: the next one starts from scratch
+    checkpoint.remove()
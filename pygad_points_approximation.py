@@ -2,10 +2,23 @@
 import pygad  # PyGAD is used for genetic algorithm functionality
 import numpy as np  # Numpy is used for numerical operations and array manipulations
 import matplotlib.pyplot as plt  # Matplotlib is used for plotting results
+import sys
+from point_cloud import load_points, squared_error  # Chunked fitness over (possibly memory-mapped) points
+from convergence import ConvergenceMonitor  # Stops the run once the best fitness stalls
+from adaptive_mutation import SuccessRule  # Adapts the mutation range with the 1/5th success rule
+from instrumentation import Instrumentation  # Per-generation timing of the GA phases (JSONL)
 
 # Define target points
 points = [(1, 1), (2, -2), (3, 4), (0, 7)]
 
+# Optionally fit a large point file instead: pass a .npy (n, 2) array or a raw float64 x, y file
+# as the first command line argument (when run as a script). The file is memory-mapped, so it never has to fit in memory.
+points_file = sys.argv[1] if __name__ == "__main__" and len(sys.argv) > 1 else None
+chunk_size = 65536  # Number of points evaluated at once for the whole population
+use_float32 = False  # Evaluate chunks in float32 for more throughput (less precise)
+
+point_array = load_points(points_file) if points_file else np.array(points, dtype=np.float64)
+
 
 # Define the polynomial function (ax^3 + bx^2 + cx + d)
 def polynomial_function(x, coefficients):
@@ -15,14 +28,14 @@ def polynomial_function(x, coefficients):
     return a * (x ** 3) + b * (x ** 2) + c * x + d
 
 
-# Fitness function evaluates how well the polynomial approximates points
-def fitness_func(ga_instance, solution, solution_idx):
-    accumulated_error = 0  # Store accumulated error
-    for point in points:  # Go through all defined points
-        # Add square of target y - predicted y to error
-        accumulated_error += abs(point[1] - polynomial_function(point[0], solution))**2
+# Fitness function evaluates how well the polynomials approximate points
+# It receives a batch of solutions (see fitness_batch_size) and evaluates all of them
+# at once with Horner's scheme, chunk by chunk over the points
+def fitness_func(ga_instance, solutions, solution_indices):
+    # Sum of squares of target y - predicted y for every solution in the batch
+    accumulated_error = squared_error(solutions, point_array, chunk_size, use_float32)
     fitness = 1 / (1.0 + accumulated_error)
-    return fitness  # Return fitness value for the solution
+    return fitness  # Return fitness values for the solutions
 
 
 # Set parameters for the genetic algorithm
@@ -43,67 +56,90 @@ keep_parents = 2  # Number of parents to keep from one generation to the next
 crossover_type = "single_point"  # Single-point crossover method is used to combine parent solutions
 mutation_type = "random"  # Random mutation method will be used to introduce variation
 mutation_percent_genes = 30  # Percentage of genes that will undergo mutation in each generation
-
-# Initialize the genetic algorithm instance with all the parameters
-ga_instance = pygad.GA(
-    num_generations=num_generations,  # Set number of generations
-    num_parents_mating=num_parents_mating,  # Set number of parents mating
-    fitness_func=fitness_func,  # Assign the fitness function
-    sol_per_pop=sol_per_pop,  # Set the number of solutions per population
-    num_genes=num_genes,  # Set the number of genes (polynomial coefficients)
-    init_range_low=init_range_low,  # Set the lower limit for gene initialization
-    init_range_high=init_range_high,  # Set the upper limit for gene initialization
-    parent_selection_type=parent_selection_type,  # Parent selection method
-    keep_parents=keep_parents,  # Number of parents to keep in the next generation
-    crossover_type=crossover_type,  # Crossover method
-    mutation_type=mutation_type,  # Mutation method
-    mutation_percent_genes=mutation_percent_genes  # Percentage of genes to mutate
-)
-
-# Run the genetic algorithm
-ga_instance.run()  # The GA runs for the specified number of generations
-
-# Get the best solution found by the GA after all generations
-solution, solution_fitness, solution_idx = ga_instance.best_solution()  # Retrieve the best solution
-
-# Print the best solution's polynomial coefficients and fitness value
-print("Best polynomial coefficients: a = {0}, b = {1}, c = {2}, d = {3}".format(
-    solution[0], solution[1], solution[2], solution[3]))  # Print coefficients for the polynomial
-print("Fitness value of the best solution = {0}".format(solution_fitness))  # Print fitness value
-
-# Generate x values for plotting the polynomial
-x_values = np.linspace(-15, 15, 100)  # Generate values of x
-# Get the predicted polynomial values for these x values using the best solution
-predicted_values = polynomial_function(x_values, solution)
-
-# Plot the actual values (target function) and the predicted polynomial values
-fig, ax = plt.subplots()  # Create a figure and axes object
-
-x_points = [point[0] for point in points]
-y_points = [point[1] for point in points]
-# Plot points using scatter (best for individual points)
-plt.scatter(x_points, y_points, color='blue', label='Data Points')
-
-# Plot the polynomial in red with a dashed line
-ax.plot(x_values, predicted_values, label='Polynomial', color='red', linestyle='dashed')
-
-ax.set_xlim(-15, 15)  # Limit x-axis
-ax.set_ylim(-15, 15)  # Limit y-axis
-
-# Add legend to the plot
-ax.legend()
-
-# Add a title and labels to the plot
-ax.set_title('Polynomial vs. points')
-ax.set_xlabel('x')
-ax.set_ylabel('y')
-
-# Enforce equal scaling of both axes
-# ax.axis('equal')
-
-# Add axis arrows using ax.arrow
-ax.arrow(-20, 0, 40, 0, head_width=0.5, head_length=1, fc='black', ec='black')
-ax.arrow(0, -20, 0, 40, head_width=0.5, head_length=1, fc='black', ec='black')
-
-# Show the plot
-plt.show()
+fitness_batch_size = sol_per_pop  # Evaluate the whole population in one fitness call
+
+# Write the time of every GA phase (fitness, selection, crossover, mutation, ...), the evaluations
+# and the best/mean fitness of every generation as JSON lines (see instrumentation.py), None to disable
+instrumentation_path = None  # e.g. "points_instrumentation.jsonl"
+
+# Stop the run once the best fitness has not improved for stall_window generations (see convergence.py),
+# e.g. 200. None runs all the generations
+stall_window = None
+
+success_rule = SuccessRule(1.0, 0.001, 10.0)  # Mutation step adapted between 0.001 and 10 (see adaptive_mutation.py)
+
+# Only run the GA when executed as a script: benchmark.py imports the fitness function and operators
+if __name__ == "__main__":
+    instrumentation = Instrumentation(instrumentation_path)
+    monitor = ConvergenceMonitor(num_generations, stall_window or num_generations)
+    # Initialize the genetic algorithm instance with all the parameters
+    ga_instance = pygad.GA(
+        num_generations=num_generations,  # Set number of generations
+        num_parents_mating=num_parents_mating,  # Set number of parents mating
+        fitness_func=instrumentation.fitness(fitness_func),  # Assign the fitness function
+        sol_per_pop=sol_per_pop,  # Set the number of solutions per population
+        num_genes=num_genes,  # Set the number of genes (polynomial coefficients)
+        init_range_low=init_range_low,  # Set the lower limit for gene initialization
+        init_range_high=init_range_high,  # Set the upper limit for gene initialization
+        parent_selection_type=parent_selection_type,  # Parent selection method
+        keep_parents=keep_parents,  # Number of parents to keep in the next generation
+        crossover_type=crossover_type,  # Crossover method
+        mutation_type=mutation_type,  # Mutation method
+        mutation_percent_genes=mutation_percent_genes,  # Percentage of genes to mutate
+        fitness_batch_size=fitness_batch_size,  # Number of solutions per fitness call
+        # Adaptive mutation range, stop once stalled, timing of every generation
+        **instrumentation.callbacks(**success_rule.callbacks(apply=SuccessRule.apply_random_mutation_step,
+                                                             **monitor.callbacks()))
+    )
+
+    # Run the genetic algorithm
+    ga_instance.run()  # The GA runs for the specified number of generations
+    instrumentation.close()
+    print(monitor.report())
+    print(success_rule.report())
+
+    # Get the best solution found by the GA after all generations
+    solution, solution_fitness, solution_idx = ga_instance.best_solution()  # Retrieve the best solution
+
+    # Print the best solution's polynomial coefficients and fitness value
+    print("Best polynomial coefficients: a = {0}, b = {1}, c = {2}, d = {3}".format(
+        solution[0], solution[1], solution[2], solution[3]))  # Print coefficients for the polynomial
+    print("Fitness value of the best solution = {0}".format(solution_fitness))  # Print fitness value
+
+    # Generate x values for plotting the polynomial
+    x_values = np.linspace(-15, 15, 100)  # Generate values of x
+    # Get the predicted polynomial values for these x values using the best solution
+    predicted_values = polynomial_function(x_values, solution)
+
+    # Plot the actual values (target function) and the predicted polynomial values
+    fig, ax = plt.subplots()  # Create a figure and axes object
+
+    plot_points = point_array[::max(1, len(point_array) // 10000)]  # Plot at most ~10000 points
+    x_points = plot_points[:, 0]
+    y_points = plot_points[:, 1]
+    # Plot points using scatter (best for individual points)
+    plt.scatter(x_points, y_points, color='blue', label='Data Points')
+
+    # Plot the polynomial in red with a dashed line
+    ax.plot(x_values, predicted_values, label='Polynomial', color='red', linestyle='dashed')
+
+    ax.set_xlim(-15, 15)  # Limit x-axis
+    ax.set_ylim(-15, 15)  # Limit y-axis
+
+    # Add legend to the plot
+    ax.legend()
+
+    # Add a title and labels to the plot
+    ax.set_title('Polynomial vs. points')
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+
+    # Enforce equal scaling of both axes
+    # ax.axis('equal')
+
+    # Add axis arrows using ax.arrow
+    ax.arrow(-20, 0, 40, 0, head_width=0.5, head_length=1, fc='black', ec='black')
+    ax.arrow(0, -20, 0, 40, head_width=0.5, head_length=1, fc='black', ec='black')
+
+    # Show the plot
+    plt.show()
@@ -2,6 +2,9 @@
 import pygad  # PyGAD is used for genetic algorithm functionality
 import numpy as np  # Numpy is used for numerical operations and array manipulations
 import matplotlib.pyplot as plt  # Matplotlib is used for plotting results
+from convergence import ConvergenceMonitor  # Stops the run once the best fitness stalls
+from adaptive_mutation import SuccessRule  # Adapts the mutation range with the 1/5th success rule
+from instrumentation import Instrumentation  # Per-generation timing of the GA phases (JSONL)
 
 
 # Define the target function (sin(x)) we want to approximate
@@ -50,66 +53,86 @@ crossover_type = "single_point"  # Single-point crossover method is used to comb
 mutation_type = "random"  # Random mutation method will be used to introduce variation
 mutation_percent_genes = 10  # Percentage of genes that will undergo mutation in each generation
 
-# Initialize the genetic algorithm instance with all the parameters
-ga_instance = pygad.GA(
-    num_generations=num_generations,  # Set number of generations
-    num_parents_mating=num_parents_mating,  # Set number of parents mating
-    fitness_func=fitness_func,  # Assign the fitness function
-    sol_per_pop=sol_per_pop,  # Set the number of solutions per population
-    num_genes=num_genes,  # Set the number of genes (polynomial coefficients)
-    init_range_low=init_range_low,  # Set the lower limit for gene initialization
-    init_range_high=init_range_high,  # Set the upper limit for gene initialization
-    parent_selection_type=parent_selection_type,  # Parent selection method
-    keep_parents=keep_parents,  # Number of parents to keep in the next generation
-    crossover_type=crossover_type,  # Crossover method
-    mutation_type=mutation_type,  # Mutation method
-    mutation_percent_genes=mutation_percent_genes  # Percentage of genes to mutate
-)
-
-# Run the genetic algorithm
-ga_instance.run()  # The GA runs for the specified number of generations
-
-# Get the best solution found by the GA after all generations
-solution, solution_fitness, solution_idx = ga_instance.best_solution()  # Retrieve the best solution
-
-# Print the best solution's polynomial coefficients and fitness value
-print("Best polynomial coefficients: a = {0}, b = {1}, c = {2}, d = {3}".format(
-    solution[0], solution[1], solution[2], solution[3]))  # Print coefficients for the polynomial
-print("Fitness value of the best solution = {0}".format(solution_fitness))  # Print fitness value
-
-# Generate x values for plotting the polynomial and sin(x)
-x_values = np.linspace(-3 * np.pi, 3 * np.pi, 100)  # Generate values of x
-# Get the predicted polynomial values for these x values using the best solution
-predicted_values = polynomial_function(x_values, solution)
-# Get the target sin(x) values for the same x values
-target_values = target_function(x_values)
-
-# Plot the actual sin(x) values (target function) and the predicted polynomial values
-fig, ax = plt.subplots()  # Create a figure and axes object
-
-# Plot sin(x) in blue
-ax.plot(x_values, target_values, label='sin(x)', color='blue')
-
-# Plot the polynomial in red with a dashed line
-ax.plot(x_values, predicted_values, label='Polynomial', color='red', linestyle='dashed')
-
-ax.set_xlim(-10, 10)  # Limit x-axis
-ax.set_ylim(-10, 10)  # Limit y-axis
-
-# Add legend to the plot
-ax.legend()
-
-# Add a title and labels to the plot
-ax.set_title('Polynomial vs. sin(x)')
-ax.set_xlabel('x')
-ax.set_ylabel('y')
-
-# Enforce equal scaling of both axes
-# ax.axis('equal')
-
-# Add axis arrows using ax.arrow
-ax.arrow(-20, 0, 40, 0, head_width=0.5, head_length=1, fc='black', ec='black')
-ax.arrow(0, -20, 0, 40, head_width=0.5, head_length=1, fc='black', ec='black')
-
-# Show the plot
-plt.show()
+# Write the time of every GA phase (fitness, selection, crossover, mutation, ...), the evaluations
+# and the best/mean fitness of every generation as JSON lines (see instrumentation.py), None to disable
+instrumentation_path = None  # e.g. "pygad_sample_instrumentation.jsonl"
+
+# Stop the run once the best fitness has not improved for stall_window generations (see convergence.py),
+# e.g. 200. None runs all the generations
+stall_window = None
+
+success_rule = SuccessRule(1.0, 0.001, 10.0)  # Mutation step adapted between 0.001 and 10 (see adaptive_mutation.py)
+
+# Only run the GA when executed as a script: benchmark.py imports the fitness function and operators
+if __name__ == "__main__":
+    instrumentation = Instrumentation(instrumentation_path)
+    monitor = ConvergenceMonitor(num_generations, stall_window or num_generations)
+    # Initialize the genetic algorithm instance with all the parameters
+    ga_instance = pygad.GA(
+        num_generations=num_generations,  # Set number of generations
+        num_parents_mating=num_parents_mating,  # Set number of parents mating
+        fitness_func=instrumentation.fitness(fitness_func),  # Assign the fitness function
+        sol_per_pop=sol_per_pop,  # Set the number of solutions per population
+        num_genes=num_genes,  # Set the number of genes (polynomial coefficients)
+        init_range_low=init_range_low,  # Set the lower limit for gene initialization
+        init_range_high=init_range_high,  # Set the upper limit for gene initialization
+        parent_selection_type=parent_selection_type,  # Parent selection method
+        keep_parents=keep_parents,  # Number of parents to keep in the next generation
+        crossover_type=crossover_type,  # Crossover method
+        mutation_type=mutation_type,  # Mutation method
+        mutation_percent_genes=mutation_percent_genes,  # Percentage of genes to mutate
+        # Adaptive mutation range, stop once stalled, timing of every generation
+        **instrumentation.callbacks(**success_rule.callbacks(apply=SuccessRule.apply_random_mutation_step,
+                                                             **monitor.callbacks()))
+    )
+
+    # Run the genetic algorithm
+    ga_instance.run()  # The GA runs for the specified number of generations
+    instrumentation.close()
+    print(monitor.report())
+    print(success_rule.report())
+
+    # Get the best solution found by the GA after all generations
+    solution, solution_fitness, solution_idx = ga_instance.best_solution()  # Retrieve the best solution
+
+    # Print the best solution's polynomial coefficients and fitness value
+    print("Best polynomial coefficients: a = {0}, b = {1}, c = {2}, d = {3}".format(
+        solution[0], solution[1], solution[2], solution[3]))  # Print coefficients for the polynomial
+    print("Fitness value of the best solution = {0}".format(solution_fitness))  # Print fitness value
+
+    # Generate x values for plotting the polynomial and sin(x)
+    x_values = np.linspace(-3 * np.pi, 3 * np.pi, 100)  # Generate values of x
+    # Get the predicted polynomial values for these x values using the best solution
+    predicted_values = polynomial_function(x_values, solution)
+    # Get the target sin(x) values for the same x values
+    target_values = target_function(x_values)
+
+    # Plot the actual sin(x) values (target function) and the predicted polynomial values
+    fig, ax = plt.subplots()  # Create a figure and axes object
+
+    # Plot sin(x) in blue
+    ax.plot(x_values, target_values, label='sin(x)', color='blue')
+
+    # Plot the polynomial in red with a dashed line
+    ax.plot(x_values, predicted_values, label='Polynomial', color='red', linestyle='dashed')
+
+    ax.set_xlim(-10, 10)  # Limit x-axis
+    ax.set_ylim(-10, 10)  # Limit y-axis
+
+    # Add legend to the plot
+    ax.legend()
+
+    # Add a title and labels to the plot
+    ax.set_title('Polynomial vs. sin(x)')
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+
+    # Enforce equal scaling of both axes
+    # ax.axis('equal')
+
+    # Add axis arrows using ax.arrow
+    ax.arrow(-20, 0, 40, 0, head_width=0.5, head_length=1, fc='black', ec='black')
+    ax.arrow(0, -20, 0, 40, head_width=0.5, head_length=1, fc='black', ec='black')
+
+    # Show the plot
+    plt.show()
@@ -0,0 +1,109 @@
+import os
+import zlib  # Captured frames are kept compressed in memory
+
+# Rendering of the pymunk simulations (the best solutions at the end of the scripts).
+# The fitness functions draw through a Renderer instead of using pygame directly:
+#   - draw=True opens a window and runs at the frame rate of the simulation (60 FPS by default);
+#   - saving an animation without drawing renders headless: frames are drawn on an offscreen
+#     surface (SDL dummy video driver, no window) and nothing limits the frame rate.
+# Captured frames never touch the disk: each one is read from the surface as raw RGB bytes,
+# reduced to the 256-color palette of the first frame and kept zlib-compressed in memory
+# (debug drawings compress very well), then the frames are decoded one at a time and
+# streamed into Pillow's GIF encoder when the renderer is closed.
+# pygame and Pillow are imported lazily, so worker processes evaluating fitness never load them.
+
+
+class Renderer:
+    """
+    Draws a pymunk space every frame, in a window and/or into an animated GIF.
+
+    Parameters:
+    width, height: size of the picture
+    draw: show the simulation in a window at fps frames per second
+    gif_path: save the frames as an animated GIF at this path when closed, None to capture nothing
+    background: fill color of every frame
+    duration: duration of a GIF frame in milliseconds
+    fps: frame rate of the window (frames are drawn as fast as possible when not drawing)
+    """
+
+    def __init__(self, width, height, draw=False, gif_path=None, background=(255, 255, 255), duration=16, fps=60):
+        if not draw:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Never open a window when only saving
+        import pygame
+        import pymunk.pygame_util
+
+        self.pygame = pygame
+        self.size = (width, height)
+        self.draw = draw
+        self.gif_path = gif_path
+        self.background = background
+        self.duration = duration
+        self.fps = fps
+        self.frames = []  # zlib-compressed palette indices of the captured frames
+        self.palette = None  # Palette image shared by all frames (avoids flickering colors)
+
+        if draw:
+            pygame.init()
+            self.surface = pygame.display.set_mode(self.size)
+            self.clock = pygame.time.Clock()
+        else:
+            self.surface = pygame.Surface(self.size)  # Offscreen, no display needed
+        self.draw_options = pymunk.pygame_util.DrawOptions(self.surface)
+
+    def frame(self, space=None, draw_func=None):
+        """
+        Draws one frame, captures it if saving and shows it if drawing.
+
+        Parameters:
+        space: pymunk space drawn with its debug drawing
+        draw_func: alternatively, a function draw_func(surface) drawing the frame itself (e.g. a replay)
+        """
+        self.surface.fill(self.background)  # Clear screen
+        if space is not None:
+            space.debug_draw(self.draw_options)  # Draw objects
+        if draw_func is not None:
+            draw_func(self.surface)
+
+        if self.gif_path:
+            self._capture()
+
+        if self.draw:
+            self.pygame.display.flip()
+            self.clock.tick(self.fps)  # Limit the frame rate
+
+    def _capture(self):
+        """Stores the current surface as compressed palette indices."""
+        from PIL import Image
+
+        image = Image.frombytes("RGB", self.size, self.pygame.image.tobytes(self.surface, "RGB"))
+        if self.palette is None:
+            self.palette = image.quantize(colors=256)
+        image = image.quantize(palette=self.palette, dither=Image.Dither.NONE)
+        self.frames.append(zlib.compress(image.tobytes(), 1))
+
+    def _images(self):
+        """Decodes the captured frames one by one."""
+        from PIL import Image
+
+        for data in self.frames:
+            image = Image.frombytes("P", self.size, zlib.decompress(data))
+            image.putpalette(self.palette.getpalette())
+            yield image
+
+    def close(self):
+        """Closes the window and writes the GIF, if any."""
+        if self.draw:
+            self.pygame.quit()
+
+        if self.gif_path and self.frames:
+            print("Saving animation as GIF...")
+            folder = os.path.dirname(self.gif_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            images = self._images()
+            # The first frame starts the file, the others are encoded as the generator produces them
+            next(images).save(self.gif_path, save_all=True, append_images=images, duration=self.duration, loop=0,
+                                optimize=False)  # Keep the shared palette, skip per-frame palette remapping
+            print(f"Animation saved as {self.gif_path}")
+        self.frames = []
+        self.palette = None
@@ -0,0 +1,355 @@
+import pymunk
+
+# Reusable scene templates for the pymunk fitness functions.
+# Building a pymunk world (floor, walls, balls, motor...) for every evaluated solution costs more
+# than needed: only a few shapes depend on the genes. A template creates the invariant shapes,
+# bodies and constraints once, and reset() assembles them into an empty pymunk.Space together
+# with the gene-dependent shapes, after putting the dynamic bodies back in their initial state.
+# An empty space is used (instead of removing and re-adding objects in the same space) because
+# pymunk numbers shapes in the order they are added to a space and resolves contacts in that
+# order: adding everything in the original order to a fresh space gives exactly the results of
+# a freshly built world, whatever was simulated before.
+# A template is not shared between processes: every worker builds its own.
+# The throw and box templates can also assemble a whole batch of candidates into a single space
+# (reset_batch), so one space.step() call advances all of them. Collision filters keep the
+# candidates apart: a shape only collides with shapes of its own candidate and the shared scenery.
+
+
+def _reset_body(body, position, velocity=(0, 0)):
+    """Puts a body back in its initial state (the body must not be in a space)."""
+    # A zero-length position update clears the bias velocities left by the last contact
+    # correction, which would otherwise nudge the body on the first step of the next evaluation
+    pymunk.Body.update_position(body, 0)
+    body.position = position
+    body.velocity = velocity
+    body.angle = 0
+    body.angular_velocity = 0
+    body.force = (0, 0)
+    body.torque = 0
+
+
+def _isolate(shapes, slot):
+    """Puts shapes in collision category slot (0-31): they only collide with that category and the default one."""
+    shape_filter = pymunk.ShapeFilter(categories=1 << slot, mask=1 << slot)
+    for shape in shapes:
+        shape.filter = shape_filter
+
+
+def _box_walls(static_body, box_x, bottom_y, top_y, box_width, elasticity):
+    """Creates the three static walls (bottom, left, right) of an open box."""
+    walls = [
+        pymunk.Segment(static_body, (box_x - box_width // 2, bottom_y), (box_x + box_width // 2, bottom_y), 5),  # Bottom
+        pymunk.Segment(static_body, (box_x - box_width // 2, bottom_y), (box_x - box_width // 2, top_y), 5),  # Left
+        pymunk.Segment(static_body, (box_x + box_width // 2, bottom_y), (box_x + box_width // 2, top_y), 5),  # Right
+    ]
+    for wall in walls:
+        wall.elasticity = elasticity
+    return walls
+
+
+def spawn_grid(num_balls, radius, left, right, bottom, spacing=1.1):
+    """
+    Returns num_balls start positions stacked in staggered rows between x = left and x = right,
+    from y = bottom upwards (pymunk coordinates, y pointing down), spacing * radius apart from each other's edge.
+    """
+    pitch = 2 * radius * spacing
+    per_row = max(1, int((right - left - 2 * radius) // pitch) + 1)
+    positions = []
+    for i in range(num_balls):
+        row, column = divmod(i, per_row)
+        offset = pitch / 2 if row % 2 and per_row > 1 else 0  # Staggered rows pack more balls
+        x = min(left + radius + column * pitch + offset, right - radius)
+        positions.append((x, bottom - row * pitch * 0.87))
+    return positions
+
+
+class SceneTemplate:
+    """Base class: owns the static body and swaps the current space for a fresh one on every reset."""
+
+    gravity = (0, 900)
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.static_body = pymunk.Body(body_type=pymunk.Body.STATIC)  # Carries every static shape
+        self.space = None
+        self.gene_shapes = []  # Static shapes built for the current genes, dropped on the next reset
+
+    def _new_space(self):
+        """Releases the objects of the previous space and returns an empty one with gravity set."""
+        if self.space is not None:
+            old = self.space
+            old.remove(*old.constraints, *old.shapes, *old.bodies)
+            for shape in self.gene_shapes:
+                shape.body = None  # Detach, otherwise the static body keeps every old shape alive
+            self.gene_shapes = []
+        self.space = pymunk.Space()
+        self.space.gravity = self.gravity
+        self.space.add(self.static_body)
+        return self.space
+
+
+class BoxScene(SceneTemplate):
+    """Three bouncy balls falling into a box whose width and height are the genes (pymunk_sample.py)."""
+
+    gravity = (0, 900)  # Gravity pulling down
+
+    def __init__(self, width=800, height=600):
+        super().__init__(width, height)
+
+        # === Create Three Balls ===
+        ball_mass, ball_radius = 5, 20
+        self.ball_positions = [(370, 100), (400, 50), (430, 80)]  # Initial positions for three balls
+        self.balls = []
+        self.ball_shapes = []
+        for pos in self.ball_positions:
+            moment = pymunk.moment_for_circle(ball_mass, 0, ball_radius)
+            ball_body = pymunk.Body(ball_mass, moment)
+            ball_shape = pymunk.Circle(ball_body, ball_radius)
+            ball_shape.elasticity = 1  # Bouncy
+            self.balls.append(ball_body)
+            self.ball_shapes.append(ball_shape)
+
+    def reset(self, box_width, box_height):
+        """Returns a space with the box for the given genes and the balls at their start positions."""
+        space = self._new_space()
+
+        box_x = 400  # Keep the box centered horizontally
+        box_y = (self.height - 100) - box_height  # Ensure the bottom of the box is always at y = 100
+        self.gene_shapes = _box_walls(self.static_body, box_x, self.height - 100, box_y, box_width, 0.5)
+        space.add(*self.gene_shapes)
+
+        for ball_body, ball_shape, pos in zip(self.balls, self.ball_shapes, self.ball_positions):
+            _reset_body(ball_body, pos)
+            space.add(ball_body, ball_shape)
+        return space
+
+    def reset_batch(self, dimensions):
+        """
+        Returns a space holding one box and its three balls for each (box_width, box_height) pair,
+        and the list of the balls of each candidate.
+        Every candidate gets its own collision category, so at most 32 candidates fit in a space.
+        """
+        if len(dimensions) > 32:
+            raise ValueError(f"At most 32 candidates per space, got {len(dimensions)}")
+        space = self._new_space()
+
+        balls = []
+        for slot, (box_width, box_height) in enumerate(dimensions):
+            box_y = (self.height - 100) - box_height
+            walls = _box_walls(self.static_body, 400, self.height - 100, box_y, box_width, 0.5)
+            self.gene_shapes.extend(walls)
+            _isolate(walls, slot)
+            space.add(*walls)
+
+            candidate_balls = []
+            for pos in self.ball_positions:
+                ball_body = pymunk.Body(5, pymunk.moment_for_circle(5, 0, 20))
+                ball_body.position = pos
+                ball_shape = pymunk.Circle(ball_body, 20)
+                ball_shape.elasticity = 1  # Bouncy
+                _isolate([ball_shape], slot)
+                space.add(ball_body, ball_shape)
+                candidate_balls.append(ball_body)
+            balls.append(candidate_balls)
+        return space, balls
+
+
+class ThrowScene(SceneTemplate):
+    """A ball thrown from (x, y) towards a box standing above the floor (pymunk_throw.py)."""
+
+    gravity = (0, 980)  # Gravity in pixels per second squared
+
+    def __init__(self, width=800, height=600, box_width=100, box_height=100):
+        super().__init__(width, height)
+        self.box_width, self.box_height = box_width, box_height
+
+        # Create ground
+        self.floor = pymunk.Segment(self.static_body, (0, height - 50), (width, height - 50), 5)
+        self.floor.elasticity = 0.8
+
+        # The box only depends on the target position, it is rebuilt when the target moves
+        self.box = None
+        self.walls = []
+
+        # Create ball
+        self.ball_body = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 15))
+        self.ball_shape = pymunk.Circle(self.ball_body, 15)
+        self.ball_shape.elasticity = 0.8
+
+    def reset(self, position, velocity, boxX, boxY):
+        """Returns a space with the box at (boxX, boxY) and the ball at position with the given velocity."""
+        space = self._new_space()
+        space.add(self.floor)
+
+        if self.box != (boxX, boxY):
+            # The previous space (and the old walls with it) was released by _new_space(), but the static
+            # body still holds the old walls: detach them, or every box position adds walls to it
+            for wall in self.walls:
+                wall.body = None
+            box_y = (self.height - boxY) - self.box_height  # Ensure the bottom of the box is always at y = boxY
+            self.walls = _box_walls(self.static_body, boxX, self.height - boxY, box_y, self.box_width, 0.5)
+            self.box = (boxX, boxY)
+        space.add(*self.walls)
+
+        _reset_body(self.ball_body, position, velocity)
+        space.add(self.ball_body, self.ball_shape)
+        return space
+
+    def reset_batch(self, position, velocities, boxX, boxY):
+        """
+        Returns a space with the box at (boxX, boxY) and one ball per velocity, all thrown from position,
+        and the list of the ball bodies. The balls share a collision group: they never hit each other.
+        """
+        space = self.reset(position, (0, 0), boxX, boxY)
+        space.remove(self.ball_body, self.ball_shape)  # Only the floor and the box are kept
+
+        balls = []
+        for velocity in velocities:
+            ball_body = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 15))
+            ball_body.position = position
+            ball_body.velocity = velocity
+            ball_shape = pymunk.Circle(ball_body, 15)
+            ball_shape.elasticity = 0.8
+            ball_shape.filter = pymunk.ShapeFilter(group=1)  # Same non-zero group: no collision between balls
+            space.add(ball_body, ball_shape)
+            balls.append(ball_body)
+        return space, balls
+
+
+class CollectorScene(SceneTemplate):
+    """
+    Balls rolling down a slope, a motor-driven arm and a collector polyline (pymunk_ball_collector.py).
+
+    Parameters:
+    num_balls: None for the twelve stacked balls of the original scene, otherwise the number of balls,
+               spawned in rows above the slope
+    ball_radius: radius of the generated balls
+    cell_size: if set, shapes are indexed with a spatial hash of this cell size instead of pymunk's
+               default bounding-box tree (faster with hundreds of balls of the same size)
+    """
+
+    gravity = (0, 900)  # Gravity pulling down
+
+    def __init__(self, width=900, height=600, num_balls=None, ball_radius=25, cell_size=None):
+        super().__init__(width, height)
+        self.cell_size = cell_size
+
+        # Create ground
+        self.floor = pymunk.Segment(self.static_body, (-100, height - 50), (width, height - 50), 5)
+        self.floor.elasticity = 0
+
+        # Create static components (slope)
+        self.slope = pymunk.Segment(self.static_body, (0, height - 160), (200, height - 50), 5)
+        self.slope.elasticity = 0
+        self.slope.friction = 0.9
+
+        # === Create Balls === (12 balls stacked above the slope, or num_balls generated spawns)
+        ball_mass = 5
+        if num_balls is None:
+            ball_radius = 25
+            ball_x = 50
+            self.ball_positions = [(ball_x, height - 500 - 50 * i) for i in range(12)]
+        else:
+            self.ball_positions = spawn_grid(num_balls, ball_radius, 0, 200, height - 500)
+        self.balls = []
+        self.ball_shapes = []
+        for pos in self.ball_positions:
+            moment = pymunk.moment_for_circle(ball_mass, 0, ball_radius)
+            ball_body = pymunk.Body(ball_mass, moment)
+            ball_shape = pymunk.Circle(ball_body, ball_radius)
+            ball_shape.elasticity = 0.3  # A little bouncy
+            self.balls.append(ball_body)
+            self.ball_shapes.append(ball_shape)
+
+        # Define motor position (the arm itself depends on the length and speed genes)
+        self.x_rot, self.y_rot = 400, height - 200
+        self.arm_body = None
+
+    def _new_space(self):
+        space = super()._new_space()
+        if self.cell_size:
+            # About 10 cells per shape keeps the hash chains short (balls, arm and scenery segments)
+            space.use_spatial_hash(self.cell_size, 10 * (len(self.balls) + 16))
+        return space
+
+    def reset(self, length, w, points_solution):
+        """Returns a space with the arm, motor and collector for the given genes and the balls at their start positions."""
+        space = self._new_space()
+        space.add(self.floor, self.slope)
+
+        for ball_body, ball_shape, pos in zip(self.balls, self.ball_shapes, self.ball_positions):
+            _reset_body(ball_body, pos)
+            space.add(ball_body, ball_shape)
+
+        # ----- Rotating stick, pinned to its center and driven by the motor -----
+        # Its mass depends on the length, so the arm is the only dynamic body built per evaluation
+        self.arm_body, _ = self._add_arm(space, length, w)
+
+        # Create static components (collector)
+        self.gene_shapes = collector = self._collector(points_solution)
+        space.add(*collector)
+        return space
+
+    def _add_arm(self, space, length, w):
+        """Adds a rotating stick, pinned to its center and driven by the motor; returns its body and shape."""
+        arm_body = pymunk.Body(body_type=pymunk.Body.DYNAMIC)
+        arm_body.position = self.x_rot, self.y_rot
+        arm_shape = pymunk.Segment(arm_body, (-length/2, 0), (length/2, 0), 5)  # Centered on the joint
+        arm_shape.density = 1
+        space.add(arm_body, arm_shape)
+        space.add(pymunk.PivotJoint(self.static_body, arm_body, (self.x_rot, self.y_rot)))  # Pin to center
+        space.add(pymunk.SimpleMotor(self.static_body, arm_body, w))  # Add motor
+        return arm_body, arm_shape
+
+    def _collector(self, points_solution):
+        """Creates the static segments of the collector polyline."""
+        collector = [
+            pymunk.Segment(self.static_body, (points_solution[i], points_solution[i+1]),
+                           (points_solution[i+2], points_solution[i+3]), 5)
+            for i in range(0, len(points_solution)-3, 2)
+        ]
+        for line in collector:
+            line.elasticity = 0
+            line.friction = 0.9
+        return collector
+
+    def reset_scenarios(self, length, w, points_solution, scenarios):
+        """
+        Returns a space simulating one design under up to 32 perturbed scenarios at once, the list of
+        the balls of each scenario and the list of the arms.
+        Every scenario has its own balls and arm, isolated by a collision category; the floor, slope
+        and collector are shared (they collide with every category).
+
+        Parameters:
+        scenarios: dict of arrays with one row per scenario and one column per ball:
+                   "radius" (radius offsets), "offset" (spawn offsets, (K, n, 2)) and "elasticity"
+        """
+        num_scenarios = len(scenarios["radius"])
+        if num_scenarios > 32:
+            raise ValueError(f"At most 32 scenarios fit in one space (collision categories), got {num_scenarios}")
+        space = self._new_space()
+        space.add(self.floor, self.slope)
+
+        balls, arms = [], []
+        for slot in range(num_scenarios):
+            scenario_balls = []
+            for i, (x, y) in enumerate(self.ball_positions):
+                radius = self.ball_shapes[i].radius + scenarios["radius"][slot][i]
+                mass = self.balls[i].mass
+                ball_body = pymunk.Body(mass, pymunk.moment_for_circle(mass, 0, radius))
+                dx, dy = scenarios["offset"][slot][i]
+                ball_body.position = x + dx, y + dy
+                ball_shape = pymunk.Circle(ball_body, radius)
+                ball_shape.elasticity = scenarios["elasticity"][slot][i]
+                _isolate([ball_shape], slot)
+                space.add(ball_body, ball_shape)
+                scenario_balls.append(ball_body)
+            balls.append(scenario_balls)
+
+            arm_body, arm_shape = self._add_arm(space, length, w)
+            _isolate([arm_shape], slot)
+            arms.append(arm_body)
+
+        self.gene_shapes = collector = self._collector(points_solution)
+        space.add(*collector)
+        return space, balls, arms
@@ -0,0 +1,48 @@
+import sys
+import time
+
+from pymunk_scenes import CollectorScene
+from pymunk_ball_collector import width, height, original_coords
+
+# Step time of the ball collector scene against the number of balls.
+# For every ball count the default collector design (arm 250 px, speed 7) is simulated for a few
+# hundred frames with pymunk's default index (bounding-box tree) and with spatial hashes of
+# several cell sizes, and the time of one space.step() is printed. Reading the position of every
+# ball (what simulate_balls did at every frame before) is timed as well.
+#
+# Usage: python scaling_benchmark.py [frames] [ball counts...]
+
+
+def time_steps(num_balls, ball_radius, cell_size, num_frames):
+    """
+    Simulates the default design with num_balls balls.
+
+    Returns:
+    The mean time of a step and of a read of every ball position, in milliseconds.
+    """
+    scene = CollectorScene(width, height, num_balls, ball_radius, cell_size)
+    points = [coordinate for point in original_coords for coordinate in point]
+    space = scene.reset(250, 7, points)
+
+    start = time.perf_counter()
+    for _ in range(num_frames):
+        space.step(1 / 60.0)
+    step_time = (time.perf_counter() - start) / num_frames
+
+    start = time.perf_counter()
+    positions = [(ball.position.x, ball.position.y) for ball in scene.balls]
+    read_time = time.perf_counter() - start
+    return 1000 * step_time, 1000 * read_time
+
+
+if __name__ == "__main__":
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    counts = [int(n) for n in sys.argv[2:]] or [12, 100, 300, 1000, 3000]
+    ball_radius = 6
+    cell_sizes = [None, 1 * ball_radius, 2 * ball_radius, 4 * ball_radius, 8 * ball_radius]
+
+    print(f"ms per step over {num_frames} frames, balls of radius {ball_radius} (read: ms to read every position once)")
+    print("balls  " + "  ".join("bb-tree" if size is None else f"hash {size:>2}" for size in cell_sizes) + "  read")
+    for num_balls in counts:
+        results = [time_steps(num_balls, ball_radius, size, num_frames) for size in cell_sizes]
+        print(f"{num_balls:>5}  " + "  ".join(f"{step:7.2f}" for step, _ in results) + f"  {results[0][1]:.2f}")
@@ -0,0 +1,141 @@
+import asyncio  # Waits for whichever evaluation finishes first
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from parallel_eval import _init_worker, _evaluate  # Same worker setup as the PoolEvaluator
+
+# Asynchronous steady-state genetic algorithm.
+# pygad evaluates a whole generation, waits for its slowest simulation, then breeds the next one:
+# with simulation costs that vary a lot (a collector with many contacts is much slower than one the
+# balls fall through), most workers sit idle at every generation barrier.
+# SteadyStateGA has no generations. It keeps one evaluation per worker (and one queued) in flight
+# in a process pool, and as soon as any of them finishes (asyncio.wait with FIRST_COMPLETED) the result is
+# inserted into the population, replacing the worst individual if it is better, and a new offspring
+# bred from the current population is submitted in its place. Workers are never idle while
+# evaluations remain.
+
+
+class SteadyStateGA:
+    """
+    Steady-state GA evaluating offspring asynchronously in a process pool.
+
+    Parameters:
+    fitness_func: pygad-style fitness function fitness_func(ga_instance, solution, solution_idx, **kwargs),
+                  defined at module level so it can be sent to the workers
+    gene_space: list of {"low": ..., "high": ...} ranges, one per gene
+    population_size: number of individuals kept
+    max_evaluations: total number of fitness evaluations (initial population included)
+    processes: number of worker processes (defaults to the number of cores)
+    kwargs: extra keyword arguments passed to every fitness_func call (sent once per worker)
+    tournament_size: number of individuals competing to become a parent
+    mutation_probability: probability for each gene of an offspring to be mutated
+    mutation_scale: standard deviation of a mutation, as a fraction of the gene range
+    seed: seed of the random generators
+    """
+
+    def __init__(self, fitness_func, gene_space, population_size=20, max_evaluations=2000, processes=None,
+                 kwargs=None, tournament_size=3, mutation_probability=0.1, mutation_scale=0.1, seed=None):
+        self.fitness_func = fitness_func
+        self.low = np.array([gene["low"] for gene in gene_space], dtype=np.float64)
+        self.high = np.array([gene["high"] for gene in gene_space], dtype=np.float64)
+        self.population_size = population_size
+        self.max_evaluations = max_evaluations
+        self.processes = processes or os.cpu_count()
+        self.kwargs = dict(kwargs or {})
+        self.tournament_size = tournament_size
+        self.mutation_probability = mutation_probability
+        self.mutation_scale = mutation_scale
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+
+        self.population = []  # Individuals (gene arrays)
+        self.fitness = []  # Their fitness values
+        self.submitted = 0
+        self.evaluations = 0
+        self.replacements = 0  # Offspring that entered the population
+        self.elapsed = 0.0
+
+    def random_individual(self):
+        """Returns a random solution within the gene ranges."""
+        return self.rng.uniform(self.low, self.high)
+
+    def tournament_selection(self):
+        """Returns the best of tournament_size random individuals of the population."""
+        contestants = self.random.sample(range(len(self.population)), min(self.tournament_size, len(self.population)))
+        return self.population[max(contestants, key=lambda i: self.fitness[i])]
+
+    def offspring(self):
+        """Breeds a new solution from two parents: uniform crossover, then Gaussian mutation."""
+        parent1, parent2 = self.tournament_selection(), self.tournament_selection()
+        child = np.where(self.rng.random(len(self.low)) < 0.5, parent1, parent2)
+        mutated = self.rng.random(len(self.low)) < self.mutation_probability
+        child = child + mutated * self.rng.normal(0, self.mutation_scale * (self.high - self.low))
+        return np.clip(child, self.low, self.high)
+
+    def insert(self, solution, fitness):
+        """Adds an evaluated solution, replacing the worst individual once the population is full."""
+        if len(self.population) < self.population_size:
+            self.population.append(solution)
+            self.fitness.append(fitness)
+            return
+        worst = int(np.argmin(self.fitness))
+        if fitness > self.fitness[worst]:
+            self.population[worst] = solution
+            self.fitness[worst] = fitness
+            self.replacements += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        initial = [self.random_individual() for _ in range(self.population_size)]
+        pending = {}  # Future -> solution being evaluated
+
+        def fill():
+            # Keep every worker busy, plus one queued evaluation so a worker finishing never waits
+            # for the main process to breed: the initial population first, then offspring
+            while len(pending) < self.processes + 1 and self.submitted < self.max_evaluations:
+                if initial:
+                    solution = initial.pop()
+                elif len(self.population) >= 2:
+                    solution = self.offspring()
+                else:
+                    break  # Wait for more of the initial population before breeding
+                task = (self.submitted, solution, {})
+                pending[loop.run_in_executor(executor, _evaluate, task)] = solution
+                self.submitted += 1
+
+        with ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                 initargs=(self.fitness_func, (), self.kwargs)) as executor:
+            fill()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    self.insert(pending.pop(future), future.result())
+                    self.evaluations += 1
+                fill()
+
+    def run(self):
+        """
+        Runs the optimization until max_evaluations evaluations are done.
+
+        Returns:
+        The best solution and its fitness.
+        """
+        start = time.perf_counter()
+        asyncio.run(self._run())
+        self.elapsed += time.perf_counter() - start
+        return self.best_solution()
+
+    def best_solution(self):
+        """Returns the best individual of the population and its fitness."""
+        best = int(np.argmax(self.fitness))
+        return self.population[best], self.fitness[best]
+
+    def report(self):
+        """Returns a one-line summary of the run."""
+        rate = self.evaluations / self.elapsed if self.elapsed else 0
+        return (f"Steady state: {self.evaluations} evaluations in {self.elapsed:.1f} s ({rate:.1f}/s) "
+                f"on {self.processes} workers, {self.replacements} offspring entered the population")
@@ -0,0 +1,137 @@
+import importlib  # The validation loads the fitness function of a script by module name
+import sys
+import time
+
+import numpy as np
+
+# Physics timestep configuration for the pymunk scripts.
+# The simulations used to call space.step(1 / 60.0) once per displayed frame, although the
+# fitness only depends on the end state. A Timing separates the three settings:
+#   - dt: duration of a frame, the unit in which frames are counted (early-termination checks,
+#     trajectory recording and rendering happen once per frame),
+#   - substeps: number of physics steps per frame, each of dt / substeps seconds,
+#   - duration: simulated time in seconds.
+# A coarser timestep is cheaper but less accurate. validate_timestep() compares the fitness of a
+# sample of candidates under several timings with a fine-timestep reference, so the cheapest
+# timing that keeps the ranking of the candidates stable can be chosen.
+#
+# Usage: python timestep.py <script module> <fitness function> [number of candidates]
+#        e.g. python timestep.py pymunk_throw throw_ball_simulation 200
+
+
+class Timing:
+    """
+    Timestep, substeps and duration of a simulation.
+
+    Parameters:
+    dt: duration of a frame in seconds
+    substeps: number of physics steps per frame
+    duration: simulated time in seconds
+    """
+
+    def __init__(self, dt=1 / 60.0, substeps=1, duration=5.0):
+        self.dt = dt
+        self.substeps = substeps
+        self.duration = duration
+        self.num_frames = int(round(duration / dt))  # Number of frames of a full simulation
+        self.step_dt = dt / substeps  # Duration of one physics step
+        self.num_steps = self.num_frames * substeps  # Number of physics steps of a full simulation
+
+    def step(self, space):
+        """Advances the space by one frame."""
+        for _ in range(self.substeps):
+            space.step(self.step_dt)
+
+    def as_dict(self):
+        """Returns the settings as a dict, e.g. to make them part of a fitness cache key."""
+        return {"dt": self.dt, "substeps": self.substeps, "duration": self.duration}
+
+    def __repr__(self):
+        return f"Timing(dt=1/{1 / self.dt:g}, substeps={self.substeps}, duration={self.duration:g})"
+
+
+def rank_correlation(a, b):
+    """Spearman rank correlation of two sequences (tied values get their average rank)."""
+    def ranks(values):
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(values, kind="stable")
+        ranked = np.empty(len(values))
+        ranked[order] = np.arange(len(values))
+        # Average the ranks of equal values (e.g. several invalid solutions with fitness 0)
+        _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+        sums = np.bincount(inverse, weights=ranked)
+        return sums[inverse] / counts[inverse]
+
+    ra, rb = ranks(a), ranks(b)
+    ra -= ra.mean()
+    rb -= rb.mean()
+    denominator = np.sqrt((ra * ra).sum() * (rb * rb).sum())
+    return float((ra * rb).sum() / denominator) if denominator else 1.0
+
+
+def validate_timestep(fitness_func, candidates, reference, timings, min_correlation=0.99):
+    """
+    Compares the fitness computed with coarser timings against a fine-timestep reference.
+
+    Parameters:
+    fitness_func: pygad-style fitness function accepting a timing keyword argument
+    candidates: sample of solutions to evaluate
+    reference: accurate Timing (small dt, several substeps) giving the reference fitness values
+    timings: Timings to validate
+    min_correlation: smallest rank correlation with the reference considered stable
+
+    Returns:
+    A list of dicts (timing, seconds per evaluation, rank correlation, mean absolute error, stable),
+    cheapest timing first, and the cheapest stable timing (or None).
+    """
+    def evaluate(timing):
+        start = time.perf_counter()
+        values = [fitness_func(None, solution, idx, timing=timing) for idx, solution in enumerate(candidates)]
+        return np.array(values, dtype=np.float64), (time.perf_counter() - start) / len(candidates)
+
+    reference_values, _ = evaluate(reference)
+    results = []
+    for timing in timings:
+        values, seconds = evaluate(timing)
+        correlation = rank_correlation(values, reference_values)
+        results.append({"timing": timing, "seconds": seconds, "correlation": correlation,
+                        "mean_abs_error": float(np.mean(np.abs(values - reference_values))),
+                        "stable": correlation >= min_correlation})
+
+    results.sort(key=lambda result: result["seconds"])
+    best = next((result["timing"] for result in results if result["stable"]), None)
+    return results, best
+
+
+def random_candidates(module, n, rng):
+    """Draws n random solutions within the gene ranges of a GA script (gene_space or init_range_low/high)."""
+    if getattr(module, "gene_space", None) is not None:
+        low = np.array([gene["low"] for gene in module.gene_space], dtype=np.float64)
+        high = np.array([gene["high"] for gene in module.gene_space], dtype=np.float64)
+    else:
+        low = np.full(module.num_genes, module.init_range_low, dtype=np.float64)
+        high = np.full(module.num_genes, module.init_range_high, dtype=np.float64)
+    return rng.uniform(low, high, size=(n, len(low)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python timestep.py <script module> <fitness function> [number of candidates]")
+        sys.exit(1)
+    script = importlib.import_module(sys.argv[1])
+    fitness_func = getattr(script, sys.argv[2])
+    num_candidates = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    duration = script.default_timing.duration
+
+    candidates = random_candidates(script, num_candidates, np.random.default_rng(0))
+    reference = Timing(1 / 60.0, 8, duration)  # 480 physics steps per second
+    timings = [Timing(1 / 60.0, substeps, duration) for substeps in (1, 2, 4)]
+    timings += [Timing(1 / 30.0, substeps, duration) for substeps in (1, 2)]
+
+    results, best = validate_timestep(fitness_func, candidates, reference, timings)
+    print(f"Reference: {reference}, {num_candidates} random candidates")
+    for result in results:
+        print(f"{result['timing']}: {1000 * result['seconds']:.2f} ms/evaluation, "
+              f"rank correlation {result['correlation']:.4f}, mean |error| {result['mean_abs_error']:.4g}"
+              f"{'' if result['stable'] else ' (unstable ranking)'}")
+    print(f"Cheapest stable timing: {best}")
@@ -0,0 +1,146 @@
+import os
+import sys
+
+import numpy as np
+
+# Trajectory recording and replay for the pymunk scripts.
+# A TrajectoryRecorder copies the position and angle of the watched bodies into preallocated
+# NumPy arrays after every step, together with the geometry of their shapes and of the static
+# shapes, and saves everything as a compressed .npz file. replay() draws such a file again
+# without pymunk: showing or exporting an evaluated solution costs no physics step, and can
+# happen on another machine (only NumPy, pygame and Pillow are needed, pymunk is not imported).
+#
+# Usage: python trajectory.py <trajectory.npz> [animation.gif]
+#        (shows the trajectory in a window, or writes it to the GIF without opening one)
+
+STATIC_COLOR = (149, 165, 166)  # Colors close to pymunk's debug drawing
+DYNAMIC_COLOR = (52, 152, 219)
+LINE_COLOR = (44, 62, 80)
+
+
+class TrajectoryRecorder:
+    """
+    Records the motion of some bodies of a space frame by frame.
+
+    Parameters:
+    space: the pymunk space being simulated; its static segments are saved as the scenery
+    bodies: dynamic bodies whose position and angle are recorded
+    max_frames: number of frames to preallocate (the simulation may stop earlier)
+    """
+
+    def __init__(self, space, bodies, max_frames):
+        import pymunk
+
+        self.bodies = list(bodies)
+        self.positions = np.zeros((max_frames, len(self.bodies), 2))
+        self.angles = np.zeros((max_frames, len(self.bodies)))
+        self.num_frames = 0
+
+        # Static segments, in world coordinates (sensors are invisible)
+        static = [shape for shape in space.shapes
+                  if shape.body.body_type == pymunk.Body.STATIC and isinstance(shape, pymunk.Segment) and not shape.sensor]
+        self.static_segments = np.array([(*shape.a, *shape.b, shape.radius) for shape in static]).reshape(-1, 5)
+
+        # Shapes of the recorded bodies, in body coordinates: (body index, x, y, radius) circles and
+        # (body index, ax, ay, bx, by, radius) segments
+        circles, segments = [], []
+        for i, body in enumerate(self.bodies):
+            for shape in body.shapes:
+                if isinstance(shape, pymunk.Circle):
+                    circles.append((i, *shape.offset, shape.radius))
+                elif isinstance(shape, pymunk.Segment):
+                    segments.append((i, *shape.a, *shape.b, shape.radius))
+        self.circles = np.array(circles).reshape(-1, 4)
+        self.segments = np.array(segments).reshape(-1, 6)
+
+    def record(self):
+        """Stores the current state of the bodies as the next frame."""
+        for i, body in enumerate(self.bodies):
+            self.positions[self.num_frames, i] = body.position
+            self.angles[self.num_frames, i] = body.angle
+        self.num_frames += 1
+
+    def save(self, path, width, height, dt, **metadata):
+        """
+        Writes the recorded frames to a compressed .npz file.
+
+        Parameters:
+        path: output file
+        width, height: size of the scene, used by the replay
+        dt: time step between two frames
+        metadata: extra values saved with the trajectory (solution, fitness, ...)
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        np.savez_compressed(path, positions=self.positions[:self.num_frames], angles=self.angles[:self.num_frames],
+                            static_segments=self.static_segments, circles=self.circles, segments=self.segments,
+                            size=np.array([width, height]), dt=dt, **metadata)
+
+
+def _rotate(points, angles):
+    """Rotates (n, 2) body-local points by the angles of their bodies."""
+    cos, sin = np.cos(angles), np.sin(angles)
+    return np.stack([points[:, 0] * cos - points[:, 1] * sin, points[:, 0] * sin + points[:, 1] * cos], axis=1)
+
+
+def draw_frame(surface, trajectory, frame_num):
+    """Draws frame frame_num of a loaded trajectory on a pygame surface."""
+    import pygame
+
+    def line(a, b, radius, color):
+        pygame.draw.line(surface, color, a, b, max(1, round(2 * radius)))
+        pygame.draw.circle(surface, color, a, radius)  # Round caps, like pymunk segments
+        pygame.draw.circle(surface, color, b, radius)
+
+    for ax, ay, bx, by, radius in trajectory["static_segments"]:
+        line((ax, ay), (bx, by), radius, STATIC_COLOR)
+
+    positions, angles = trajectory["positions"][frame_num], trajectory["angles"][frame_num]
+
+    segments = trajectory["segments"]
+    if len(segments):
+        body = segments[:, 0].astype(int)
+        a = positions[body] + _rotate(segments[:, 1:3], angles[body])
+        b = positions[body] + _rotate(segments[:, 3:5], angles[body])
+        for start, end, radius in zip(a, b, segments[:, 5]):
+            line(start, end, radius, DYNAMIC_COLOR)
+
+    circles = trajectory["circles"]
+    if len(circles):
+        body = circles[:, 0].astype(int)
+        centers = positions[body] + _rotate(circles[:, 1:3], angles[body])
+        for center, radius, angle in zip(centers, circles[:, 3], angles[body]):
+            pygame.draw.circle(surface, DYNAMIC_COLOR, center, radius)
+            # A radius shows the rotation of the ball
+            pygame.draw.line(surface, LINE_COLOR, center, center + radius * np.array([np.cos(angle), np.sin(angle)]))
+
+
+def replay(path, draw=True, gif_path=None, background=(255, 255, 255), duration=16):
+    """
+    Draws a saved trajectory without simulating it.
+
+    Parameters:
+    path: .npz file written by TrajectoryRecorder.save()
+    draw: show the replay in a window at 60 FPS
+    gif_path: also save the replay as an animated GIF at this path (rendered headless if draw is False)
+    background: fill color of every frame
+    duration: duration of a GIF frame in milliseconds
+    """
+    from pymunk_render import Renderer
+
+    with np.load(path) as data:
+        trajectory = dict(data)
+    width, height = trajectory["size"]
+    renderer = Renderer(int(width), int(height), draw, gif_path, background=background, duration=duration)
+    for frame_num in range(len(trajectory["positions"])):
+        renderer.frame(draw_func=lambda surface: draw_frame(surface, trajectory, frame_num))
+    renderer.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python trajectory.py <trajectory.npz> [animation.gif]")
+        sys.exit(1)
+    output = sys.argv[2] if len(sys.argv) > 2 else None
+    replay(sys.argv[1], draw=output is None, gif_path=output)
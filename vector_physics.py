@@ -0,0 +1,161 @@
+import sys
+
+import numpy as np
+
+# Vectorized NumPy physics for balls bouncing on static segments (the throw problem).
+# Each candidate is one circle in a scene of static segments, and circles never touch each other,
+# so the whole population is simulated with array operations: one NumPy step advances all P balls.
+# The step follows Chipmunk (the engine behind pymunk) closely, to reproduce its results:
+#   1. positions move with the velocity plus the bias velocity of the last step (position correction),
+#   2. contacts are detected (closest point of each segment, distance below the sum of the radii),
+#   3. the bounce of each contact is computed from the velocity before gravity (elasticity of the
+#      circle times elasticity of the segment, as pymunk combines them),
+#   4. gravity is added, the impulses of the last step are applied again (warm start) and a
+#      sequential impulse solver runs `iterations` times over the contacts, accumulating clamped
+#      normal impulses and bias (penetration correction) impulses.
+# There is no friction (the throw scene uses pymunk's default friction of 0) and the balls do not
+# rotate. Small differences with pymunk remain possible (floating-point order), see cross_check().
+#
+# Usage: python vector_physics.py [number of candidates]  (cross-checks the engine against pymunk on random throws)
+
+COLLISION_SLOP = 0.1  # pymunk defaults: overlap allowed without correction,
+COLLISION_BIAS = (1 - 0.1) ** 60  # fraction of the overlap left after a second,
+COLLISION_PERSISTENCE = 3  # and steps a lost contact keeps its impulse for warm starting
+
+
+class CircleSegmentEngine:
+    """
+    Simulates P independent circles colliding with shared static segments.
+
+    Parameters:
+    segments: (S, 5) array of static segments (ax, ay, bx, by, radius)
+    segment_elasticity: S elasticities of the segments
+    radius: radius of the circles
+    elasticity: elasticity of the circles
+    gravity: (gx, gy) gravity
+    iterations: impulse solver iterations per step (pymunk's space.iterations)
+    """
+
+    def __init__(self, segments, segment_elasticity, radius, elasticity, gravity, iterations=10):
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 5)
+        self.a, self.b = segments[:, 0:2], segments[:, 2:4]
+        self.min_distance = radius + segments[:, 4]  # Contact below this center-segment distance
+        self.elasticity = elasticity * np.asarray(segment_elasticity, dtype=np.float64)
+        self.gravity = np.asarray(gravity, dtype=np.float64)
+        self.iterations = iterations
+
+    def simulate(self, positions, velocities, num_steps, dt):
+        """
+        Advances all the circles by num_steps steps of dt seconds.
+
+        Parameters:
+        positions: (P, 2) start positions
+        velocities: (P, 2) start velocities
+
+        Returns:
+        The (P, 2) final positions and velocities.
+        """
+        p = np.array(positions, dtype=np.float64)
+        v = np.array(velocities, dtype=np.float64)
+        v_bias = np.zeros_like(p)
+        num_segments = len(self.a)
+        jn_cached = np.zeros((len(p), num_segments))  # Accumulated normal impulse of every contact
+        last_contact = np.full((len(p), num_segments), -COLLISION_PERSISTENCE - 1)  # Step of its last contact
+
+        segment = self.b - self.a
+        segment_length_sq = (segment * segment).sum(axis=1)
+        bias_coef = 1 - COLLISION_BIAS ** dt
+
+        for step in range(num_steps):
+            # 1. Integrate positions
+            p += (v + v_bias) * dt
+            v_bias[:] = 0
+
+            # 2. Contacts: closest point of every segment to every center, (P, S) arrays
+            to_center = p[:, None, :] - self.a[None, :, :]
+            t = np.clip((to_center * segment).sum(axis=2) / segment_length_sq, 0, 1)
+            delta = to_center - t[:, :, None] * segment  # From the closest point to the center
+            distance = np.sqrt((delta * delta).sum(axis=2))
+            touching = distance < self.min_distance
+            if not touching.any():
+                v += self.gravity * dt
+                continue
+
+            # Only the balls touching something go through the solver
+            rows = np.flatnonzero(touching.any(axis=1))
+            touching, distance, delta = touching[rows], distance[rows], delta[rows]
+            v_rows, v_bias_rows = v[rows], v_bias[rows]
+
+            normal = delta / np.where(distance > 0, distance, 1)[:, :, None]  # Points from the segment to the center
+            # 3. Pre-step: bounce from the velocity before gravity, bias from the overlap
+            bounce = (v_rows[:, None, :] * normal).sum(axis=2) * self.elasticity
+            bias = -bias_coef * np.minimum(0, distance - self.min_distance + COLLISION_SLOP) / dt
+
+            # Impulses of contacts seen within the persistence window are reused to warm start the solver
+            warm = touching & (step - last_contact[rows] <= COLLISION_PERSISTENCE)
+            jn = np.where(warm, jn_cached[rows], 0)
+            jb = np.zeros_like(jn)
+            last_contact[rows] = np.where(touching, step, last_contact[rows])
+
+            # 4. Integrate velocities, apply the cached impulses, then iterate the solver
+            v += self.gravity * dt
+            v_rows += self.gravity * dt
+            v_rows += (normal * jn[:, :, None]).sum(axis=1)
+            # A ball touching a single segment is solved exactly by the first iteration (its impulses are
+            # clamped accumulations): the other iterations are only needed when a ball has several contacts
+            iterations = self.iterations if (touching.sum(axis=1) > 1).any() else 1
+            active_segments = np.flatnonzero(touching.any(axis=0))
+            for _ in range(iterations):
+                for s in active_segments:  # Contacts are solved one after the other, as in Chipmunk
+                    active = touching[:, s]
+                    n = normal[:, s]
+                    vb_n = (v_bias_rows * n).sum(axis=1)
+                    jb_new = np.where(active, np.maximum(jb[:, s] + (bias[:, s] - vb_n), 0), 0)
+                    vr_n = (v_rows * n).sum(axis=1)
+                    jn_new = np.where(active, np.maximum(jn[:, s] - (bounce[:, s] + vr_n), 0), 0)
+                    v_bias_rows += (jb_new - jb[:, s])[:, None] * n
+                    v_rows += (jn_new - jn[:, s])[:, None] * n
+                    jb[:, s] = jb_new
+                    jn[:, s] = jn_new
+            v[rows], v_bias[rows] = v_rows, v_bias_rows
+            jn_cached[rows] = np.where(touching, jn, jn_cached[rows])
+        return p, v
+
+
+def cross_check(num_candidates=200, seed=0):
+    """
+    Compares the NumPy engine with pymunk on random throws of pymunk_throw.py.
+
+    Returns:
+    A dict with the largest end-position difference (pixels), the number of throws whose end positions
+    differ by more than a pixel, and the number of throws landing in the box for one engine only.
+    """
+    import pymunk_throw  # Gene space of the throws
+    from headless_eval import throw_ball_numpy_positions, throw_ball_numpy_simulation, throw_ball_simulation, throw_scene
+
+    rng = np.random.default_rng(seed)
+    low = [gene["low"] for gene in pymunk_throw.gene_space]
+    high = [gene["high"] for gene in pymunk_throw.gene_space]
+    solutions = rng.uniform(low, high, size=(num_candidates, len(low)))
+
+    numpy_positions = throw_ball_numpy_positions(solutions)
+    pymunk_positions = []
+    for solution in solutions:
+        throw_ball_simulation(None, solution, 0)
+        pymunk_positions.append(tuple(throw_scene.ball_body.position))
+    pymunk_positions = np.array(pymunk_positions)
+
+    numpy_fitness = np.array(throw_ball_numpy_simulation(None, solutions, None))
+    pymunk_fitness = np.array([throw_ball_simulation(None, solution, 0) for solution in solutions])
+    error = np.linalg.norm(numpy_positions - pymunk_positions, axis=1)
+    return {"candidates": num_candidates, "max_position_error": float(error.max()),
+            "positions_off_by_1px": int((error > 1).sum()),
+            "hit_disagreements": int(((numpy_fitness >= 10000) != (pymunk_fitness >= 10000)).sum()),
+            "max_fitness_relative_error": float(np.max(np.abs(numpy_fitness - pymunk_fitness) / np.abs(pymunk_fitness)))}
+
+
+if __name__ == "__main__":
+    result = cross_check(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    print(f"{result['candidates']} random throws: largest end-position difference {result['max_position_error']:.3g} px, "
+          f"{result['positions_off_by_1px']} off by more than 1 px, {result['hit_disagreements']} hit/miss disagreements, "
+          f"largest relative fitness difference {result['max_fitness_relative_error']:.3g}")
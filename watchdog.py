@@ -0,0 +1,86 @@
+import multiprocessing  # Shared counters, so worker processes report to the main process
+import time
+
+import numpy as np
+
+# Per-evaluation time budget for the physics fitness functions.
+# Fast throws and odd collector geometries sometimes start contact cascades that make a single
+# simulation many times slower than the others, and the whole generation waits for it.
+# An EvaluationBudget bounds every evaluation in wall-clock seconds and/or physics steps:
+#   - the fitness functions call watch.check() after every frame (budget.start() returns the watch);
+#     past the budget it raises BudgetExceeded, and PoolEvaluator scores the solution with the
+#     penalty fitness instead (in the main process when evaluating serially, in the worker otherwise);
+#   - a pymunk step that never returns cannot check anything: the PoolEvaluator then waits at most
+#     kill_after seconds for the result of each evaluation, kills the stuck pool, penalizes the
+#     solution, starts a new pool and resubmits the other evaluations of the batch.
+# Every timeout is logged with the genes of the solution.
+
+
+class BudgetExceeded(Exception):
+    """Raised inside a fitness function whose evaluation went over its budget."""
+
+
+class EvaluationBudget:
+    """
+    Wall-clock and step budget of a single fitness evaluation.
+
+    Parameters:
+    seconds: maximum wall-clock duration of an evaluation, None for no limit
+    steps: maximum number of physics steps of an evaluation, None for no limit
+    penalty: fitness given to an evaluation over budget (choose it below any real fitness)
+    kill_after: seconds after which the PoolEvaluator kills a worker that has not returned
+                (default: twice the seconds budget; None if seconds is None)
+    log_path: file the timeouts are appended to, None to print them
+    """
+
+    def __init__(self, seconds=None, steps=None, penalty=0.0, kill_after=None, log_path=None):
+        self.seconds = seconds
+        self.steps = steps
+        self.penalty = penalty
+        self.kill_after = kill_after if kill_after is not None else (2 * seconds if seconds else None)
+        self.log_path = log_path
+        # [evaluations started, stopped by the budget check, killed by the pool]
+        self.counters = multiprocessing.Array("q", 3)
+
+    def start(self):
+        """Returns the watch of one evaluation, to be checked after every frame."""
+        with self.counters.get_lock():
+            self.counters[0] += 1
+        return _Watch(self)
+
+    def timed_out(self, solution, reason, killed=False):
+        """Logs an evaluation over budget with its genes, counts it and returns the penalty fitness."""
+        with self.counters.get_lock():
+            self.counters[2 if killed else 1] += 1
+        genes = np.array2string(np.asarray(solution, dtype=np.float64), precision=6, separator=", ", max_line_width=10**6)
+        line = f"Evaluation over budget ({reason}), penalty {self.penalty}: genes {genes}"
+        if self.log_path:
+            with open(self.log_path, "a") as log:
+                log.write(line + "\n")
+        else:
+            print(line)
+        return self.penalty
+
+    def report(self):
+        """Returns a one-line summary of the evaluations stopped so far."""
+        with self.counters.get_lock():
+            started, stopped, killed = self.counters[:]
+        return f"Evaluation budget: {stopped} of {started} evaluations stopped over budget, {killed} stuck workers killed"
+
+
+class _Watch:
+    """Budget state of a single evaluation."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.start = time.perf_counter()
+
+    def check(self, steps):
+        """Called after each frame with the number of physics steps done: raises BudgetExceeded past the budget."""
+        budget = self.budget
+        if budget.steps is not None and steps > budget.steps:
+            raise BudgetExceeded(f"{steps} steps > {budget.steps}")
+        if budget.seconds is not None:
+            elapsed = time.perf_counter() - self.start
+            if elapsed > budget.seconds:
+                raise BudgetExceeded(f"{elapsed:.3g} s > {budget.seconds} s after {steps} steps")